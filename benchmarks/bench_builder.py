@@ -0,0 +1,68 @@
+"""
+Compare markdownify's string concatenation with the output-builder mode of TwoPassConverter
+on deeply nested Confluence layouts.
+
+    python benchmarks/bench_builder.py [--depth 10 50 150] [--blocks 2] [--sections 50] [--repeat 3]
+
+For each nesting depth it reports the best conversion time and the peak memory allocated
+by the conversion (tracemalloc, from a separate traced run) of both modes, and checks
+that they produce the same Markdown before the blank-line collapsing pass.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from c2m.converter import TwoPassConverter, default_parser  # noqa: E402
+from sample_html import deeply_nested_page  # noqa: E402
+
+def convert(soup, output_builder):
+    return TwoPassConverter(output_builder=output_builder).convert_soup(soup)
+
+def measure(html, output_builder, repeat):
+    """
+    (markdown, best seconds, peak bytes) of converting html; parsing is not measured.
+    """
+    timings = []
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, default_parser())
+        start = time.perf_counter()
+        markdown = convert(soup, output_builder)
+        timings.append(time.perf_counter() - start)
+
+    soup = BeautifulSoup(html, default_parser())
+    tracemalloc.start()
+    try:
+        convert(soup, output_builder)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return markdown, min(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, nargs="+", default=[10, 50, 150],
+                        help="layout wrappers around each block (default: 10 50 150)")
+    parser.add_argument("--blocks", type=int, default=2, help="nested layout blocks per page (default: 2)")
+    parser.add_argument("--sections", type=int, default=50, help="page sections inside each block (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mode, the best is reported (default: 3)")
+    args = parser.parse_args()
+
+    print(f"{'depth':>5} {'KB':>7} {'concat (s)':>11} {'builder (s)':>12} {'concat peak':>12} "
+          f"{'builder peak':>13} {'peak saved':>11}")
+    for depth in args.depth:
+        html = deeply_nested_page(blocks=args.blocks, depth=depth, sections_per_block=args.sections)
+        concat_md, concat_time, concat_peak = measure(html, False, args.repeat)
+        builder_md, builder_time, builder_peak = measure(html, True, args.repeat)
+        if builder_md != concat_md:
+            raise SystemExit(f"depth {depth}: the output-builder mode produced different Markdown")
+        print(f"{depth:>5} {len(html) / 1024:>7.0f} {concat_time:>11.3f} {builder_time:>12.3f} "
+              f"{concat_peak / 1024 / 1024:>10.1f}MB {builder_peak / 1024 / 1024:>11.1f}MB "
+              f"{1 - builder_peak / concat_peak:>10.0%}")
+
+if __name__ == "__main__":
+    main()
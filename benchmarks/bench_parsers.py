@@ -0,0 +1,48 @@
+"""
+Compare the BeautifulSoup parsers available to TwoPassConverter on representative
+Confluence body.view HTML.
+
+    python benchmarks/bench_parsers.py [--size-mb 3] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from c2m.converter import available_parsers, custom_md  # noqa: E402
+from sample_html import page_of_size  # noqa: E402
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=3.0, help="size of the generated page body (default: 3)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per parser, the best is reported (default: 3)")
+    args = parser.parse_args()
+
+    html = page_of_size(int(args.size_mb * 1024 * 1024))
+    print(f"body.view HTML: {len(html) / 1024 / 1024:.2f} MB")
+    print(f"{'parser':<12} {'parse (s)':>10} {'vs html.parser':>15} {'custom_md (s)':>14}")
+
+    results = {}
+    for parser_name in available_parsers():
+        parse_time = best_time(lambda: BeautifulSoup(html, parser_name), args.repeat)
+        convert_time = best_time(lambda: custom_md(html, base_url="https://confluence.example.com",
+                                                   parser=parser_name), args.repeat)
+        results[parser_name] = (parse_time, convert_time)
+    baseline = results.get("html.parser", (None,))[0]
+    for parser_name, (parse_time, convert_time) in results.items():
+        ratio = f"{baseline / parse_time:.2f}x" if baseline else "-"
+        print(f"{parser_name:<12} {parse_time:>10.3f} {ratio:>15} {convert_time:>14.3f}")
+
+if __name__ == "__main__":
+    main()
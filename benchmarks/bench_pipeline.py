@@ -0,0 +1,133 @@
+"""
+Benchmark the export pipeline of one page, stage by stage, against a local stub server.
+
+    python benchmarks/bench_pipeline.py [--scenario NAME ...] [--repeat 3] [--parser lxml]
+                                        [--image-size 32768] [--latency 0] [--download-workers 8]
+
+For every corpus page (see corpus.py) it reports the best wall time of each stage
+(fetch, parse, convert, finalize_toc, assets, write) and, from a separate tracemalloc run,
+the peak Python memory allocated during each stage. tracemalloc slows Python code down,
+so the timings come from untraced runs. Memory allocated by C libraries (lxml) is not traced.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from c2m.assets import resolve_assets  # noqa: E402
+from c2m.client import ConfluenceClient  # noqa: E402
+from c2m.converter import ConversionResult, TwoPassConverter, available_parsers  # noqa: E402
+from c2m.export import fetch_page, write_page  # noqa: E402
+from c2m.urls import images_folder  # noqa: E402
+from corpus import SCENARIOS, load_corpus  # noqa: E402
+from stub_server import StubConfluence  # noqa: E402
+
+STAGES = ("fetch", "parse", "convert", "finalize_toc", "assets", "write")
+
+class StageRecorder:
+    """
+    Times each stage and, when tracemalloc is tracing, records the peak memory it allocated.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.peak_bytes = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        yield
+        self.seconds[name] = time.perf_counter() - start
+        if tracing:
+            self.peak_bytes[name] = tracemalloc.get_traced_memory()[1] - baseline
+
+def run_pipeline(client, page_id, out_dir, parser, download_workers):
+    """
+    One export of page_id, split into the stages of export_page().
+    """
+    recorder = StageRecorder()
+    with recorder.stage("fetch"):
+        page = fetch_page(client, page_id)
+    converter = TwoPassConverter(base_url=client.base_url, parser=parser, page_id=page_id)
+    with recorder.stage("parse"):
+        soup = BeautifulSoup(page["body"]["view"]["value"], converter.parser)
+    with recorder.stage("convert"):
+        intermediate_md = converter.convert_soup(soup)
+    with recorder.stage("finalize_toc"):
+        markdown = converter.finalize_toc(intermediate_md)
+    images_dir = os.path.join(out_dir, images_folder(page_id))
+    os.makedirs(images_dir, exist_ok=True)
+    with recorder.stage("assets"):
+        markdown = resolve_assets(client, ConversionResult(markdown, converter.assets), page_id, images_dir,
+                                  workers=download_workers)
+    with recorder.stage("write"):
+        write_page(page, page["title"], out_dir, markdown)
+    return recorder
+
+# Per-stage peaks need tracemalloc.reset_peak() (Python 3.9+); older versions only report times
+TRACE_MEMORY = hasattr(tracemalloc, "reset_peak")
+
+def benchmark_page(stub, page_id, args):
+    """
+    (best seconds per stage, peak bytes per stage) of args.repeat timed runs and one traced run
+    (no peaks before Python 3.9).
+    """
+    runs = []
+    for traced in [False] * args.repeat + [True] * TRACE_MEMORY:
+        # A fresh client per run: caches and connections are not reused across runs
+        with ConfluenceClient(stub.base_url, "benchmark-token", pool_size=args.download_workers) as client, \
+                tempfile.TemporaryDirectory() as out_dir:
+            if traced:
+                tracemalloc.start()
+            try:
+                runs.append(run_pipeline(client, page_id, out_dir, args.parser, args.download_workers))
+            finally:
+                if traced:
+                    tracemalloc.stop()
+    best = {stage: min(run.seconds[stage] for run in runs[:args.repeat]) for stage in STAGES}
+    return best, runs[-1].peak_bytes if TRACE_MEMORY else {}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", action="append",
+                        help=f"corpus page to run, repeatable (default: all of {', '.join(SCENARIOS)} "
+                             "and the recorded pages)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per page, the best is reported (default: 3)")
+    parser.add_argument("--parser", choices=available_parsers(), default=None,
+                        help="BeautifulSoup parser (default: the fastest installed)")
+    parser.add_argument("--image-size", type=int, default=32 * 1024,
+                        help="size of every served image in bytes (default: 32768)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="delay added to every stub response in seconds (default: 0)")
+    parser.add_argument("--download-workers", type=int, default=8,
+                        help="images downloaded in parallel (default: 8)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.scenario)
+    with StubConfluence(image_size=args.image_size, latency=args.latency) as stub:
+        header = f"{'page':<16} {'KB':>7} " + " ".join(f"{stage:>12}" for stage in STAGES) + f" {'total':>8}"
+        print("seconds (best of {0}){1} per stage".format(args.repeat, " / peak MB" if TRACE_MEMORY else ""))
+        print(header)
+        for page_id, (name, html) in enumerate(corpus.items(), start=1000):
+            stub.add_page(page_id, name, html)
+            best, peaks = benchmark_page(stub, str(page_id), args)
+            print(f"{name:<16} {len(html) / 1024:>7.0f} "
+                  + " ".join(f"{best[stage]:>12.3f}" for stage in STAGES)
+                  + f" {sum(best.values()):>8.3f}")
+            if peaks:
+                print(f"{'':<16} {'':>7} "
+                      + " ".join(f"{peaks[stage] / 1024 / 1024:>10.1f}MB" for stage in STAGES)
+                      + f" {max(peaks.values()) / 1024 / 1024:>6.1f}MB")
+
+if __name__ == "__main__":
+    main()
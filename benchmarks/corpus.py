@@ -0,0 +1,49 @@
+"""
+Benchmark corpus of Confluence body.view HTML.
+
+The built-in scenarios are generated (see sample_html.py) so the numbers are reproducible;
+each one stresses one part of the conversion hot path. Pages recorded from a real instance
+with record_page.py are saved as corpus/<name>.html and are picked up as extra scenarios.
+"""
+import os
+
+from sample_html import confluence_page, nested_macros_page
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+SCENARIOS = {
+    # A few sections with very large tables
+    "large-tables": lambda: confluence_page(sections=10, table_rows=400, table_cols=12, drawio=False),
+    # Hundreds of short sections: many headings and links, small tables
+    "many-headings": lambda: confluence_page(sections=800, table_rows=2, table_cols=3, drawio=False),
+    # Dozens of draw.io macros, each one an attachment lookup and a download
+    "drawio": lambda: confluence_page(sections=60, table_rows=5, table_cols=4, drawio=True),
+    # A TOC macro after every other section
+    "toc": lambda: confluence_page(sections=300, table_rows=2, table_cols=3, drawio=False, toc_every=2),
+    # Deeply nested layout macros with diagrams and TOCs inside
+    "nested-macros": lambda: nested_macros_page(blocks=150, depth=6),
+}
+
+def recorded_pages():
+    """
+    {name: html} of the pages recorded under corpus/.
+    """
+    pages = {}
+    if not os.path.isdir(CORPUS_DIR):
+        return pages
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        if filename.endswith(".html"):
+            with open(os.path.join(CORPUS_DIR, filename), encoding="utf-8") as f:
+                pages[filename[:-len(".html")]] = f.read()
+    return pages
+
+def load_corpus(names=None):
+    """
+    {name: html} of the generated scenarios and recorded pages, optionally restricted to names.
+    """
+    corpus = {name: build() for name, build in SCENARIOS.items() if not names or name in names}
+    corpus.update((name, html) for name, html in recorded_pages().items() if not names or name in names)
+    missing = set(names or ()) - set(corpus)
+    if missing:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(missing))}")
+    return corpus
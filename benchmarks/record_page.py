@@ -0,0 +1,34 @@
+"""
+Record the body.view HTML of real Confluence pages into the benchmark corpus.
+
+    BEARER_TOKEN=... python benchmarks/record_page.py https://confluence.example.com 123456 [name]
+
+The page is saved as benchmarks/corpus/<name>.html (default name: the page id) and is then
+benchmarked by bench_pipeline.py alongside the generated scenarios.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from c2m.client import ConfluenceClient  # noqa: E402
+from c2m.export import fetch_page  # noqa: E402
+from corpus import CORPUS_DIR  # noqa: E402
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        raise SystemExit(__doc__.strip())
+    base_url, page_id = sys.argv[1], sys.argv[2]
+    name = sys.argv[3] if len(sys.argv) == 4 else page_id
+    with ConfluenceClient(base_url, os.environ["BEARER_TOKEN"]) as client:
+        page = fetch_page(client, page_id)
+    if not page:
+        raise SystemExit(f"No page {page_id} on {base_url}")
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    path = os.path.join(CORPUS_DIR, f"{name}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page["body"]["view"]["value"])
+    print(f"Recorded {page.get('title', page_id)} in {path}")
+
+if __name__ == "__main__":
+    main()
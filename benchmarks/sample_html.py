@@ -0,0 +1,109 @@
+"""
+Synthetic Confluence body.view HTML shaped like the pages we export: numbered headings,
+paragraphs with links and inline formatting, wide tables, expand/panel layouts, images,
+code blocks, draw.io and TOC macros.
+"""
+import base64
+import json
+
+def drawio_macro(name, width=600, height=400):
+    macro_data = base64.b64encode(json.dumps({"diagramName": name, "previewName": name + ".png"}).encode()).decode()
+    return (
+        f'<div class="conf-macro output-block" data-macro-name="drawio" data-hasbody="false">'
+        f'<div class="drawio-macro" style="width:{width}px;height:{height}px"></div>'
+        f'<div id="drawio-macro-data-{name}" style="display:none">{macro_data}</div></div>'
+    )
+
+def toc_macro(**params):
+    attrs = "".join(f' data-{key}="{value}"' for key, value in params.items())
+    return f'<div class="toc-macro client-side-toc-macro conf-macro output-block" data-macro-name="toc"{attrs}></div>'
+
+def table(rows, cols):
+    header = "".join(f"<th>Column {c}</th>" for c in range(cols))
+    body = "".join(
+        "<tr>" + "".join(f"<td><p>cell {r}.{c} <strong>value</strong></p></td>" for c in range(cols)) + "</tr>"
+        for r in range(rows)
+    )
+    return f'<div class="table-wrap"><table class="confluenceTable"><tbody><tr>{header}</tr>{body}</tbody></table></div>'
+
+def section(index, table_rows=20, table_cols=6, drawio=True):
+    parts = [
+        f'<h1 id="Page-{index}" data-nh-numbering="{index}. ">Section {index}</h1>',
+        f"<p>Intro of section {index} with <a href=\"/display/SPACE/Other+Page+{index}\">a link</a>, "
+        f"<a href=\"https://example.com/{index}\">an external link</a>, <em>emphasis</em> and <code>code</code>.</p>",
+        f'<h2 id="Page-{index}.1">{index}.1 Details</h2>',
+        '<div class="expand-container"><div class="expand-content"><div class="panel"><div class="panelContent">'
+        f"<p>Nested panel text {index}</p><ul><li>first</li><li>second <a href=\"/x/{index}\">ref</a></li></ul>"
+        "</div></div></div></div>",
+        f'<h3 id="Page-{index}.1.1">Data</h3>',
+        table(table_rows, table_cols),
+        f'<p><img class="confluence-embedded-image" src="/download/attachments/123/image-{index}.png?version=1&amp;api=v2"'
+        f' data-image-src="/download/attachments/123/image-{index}.png?version=1&amp;api=v2"'
+        f' data-linked-resource-id="{1000 + index}" data-linked-resource-version="1" /></p>',
+        '<div class="code panel pdl"><div class="codeContent panelContent pdl"><pre class="syntaxhighlighter-pre">'
+        f"SELECT * FROM table_{index};\n-- comment</pre></div></div>",
+    ]
+    if drawio:
+        parts.append(drawio_macro(f"diagram-{index}"))
+    return "".join(parts)
+
+def confluence_page(sections=50, table_rows=20, table_cols=6, drawio=True, toc_every=0):
+    """
+    A page of `sections` sections; toc_every > 0 adds a TOC macro every toc_every sections.
+    """
+    parts = [toc_macro(maxlevel=3)]
+    for index in range(1, sections + 1):
+        parts.append(section(index, table_rows, table_cols, drawio))
+        if toc_every and index % toc_every == 0:
+            parts.append(toc_macro())
+    return "".join(parts)
+
+def page_of_size(size_bytes, **kwargs):
+    """
+    A confluence_page() of roughly size_bytes of HTML.
+    """
+    one_section = len(section(1, kwargs.get("table_rows", 20), kwargs.get("table_cols", 6)))
+    return confluence_page(sections=max(1, size_bytes // one_section), **kwargs)
+
+def nested_macros(index, depth=6):
+    """
+    Macros nested depth levels deep (expand > panel > section/column > info ...), as produced
+    by layout-heavy pages, with a draw.io diagram and an inner TOC at the bottom.
+    """
+    opening = "".join(
+        f'<div class="conf-macro output-block" data-macro-name="{name}"><div class="{name}-content">'
+        for name in ("expand", "panel", "section", "column", "info", "details")[:depth]
+    )
+    closing = "</div></div>" * min(depth, 6)
+    inner = (
+        f'<h2 id="Nested-{index}">Nested {index}</h2>'
+        f"<p>Deep paragraph {index} with <strong>bold <em>and italic <code>code</code></em></strong>.</p>"
+        f"<ul><li>level 1<ul><li>level 2<ul><li>level 3 <a href=\"/x/{index}\">ref</a></li></ul></li></ul></li></ul>"
+        + table(4, 3) + drawio_macro(f"nested-{index}") + toc_macro(maxlevel=2)
+    )
+    return opening + inner + closing
+
+def nested_macros_page(blocks=100, depth=6):
+    return toc_macro() + "".join(
+        f'<h1 id="Block-{index}">Block {index}</h1>' + nested_macros(index, depth) for index in range(1, blocks + 1)
+    )
+
+LAYOUT_WRAPPERS = (
+    '<div class="contentLayout2"><div class="columnLayout single" data-layout="single">',
+    '<div class="cell normal" data-type="normal"><div class="innerCell">',
+    '<div class="panel"><div class="panelContent">',
+    '<div class="conf-macro output-block" data-macro-name="section"><div class="section-content">',
+)
+
+def deeply_nested_page(blocks=50, depth=40, sections_per_block=2):
+    """
+    blocks layout trees nesting their content depth wrappers deep (section > column > panel > div ...),
+    each wrapper being two divs, as produced by page layouts with nested macros.
+    """
+    parts = []
+    for block in range(1, blocks + 1):
+        content = "".join(section(block * 100 + i, table_rows=5, table_cols=4, drawio=False)
+                          for i in range(sections_per_block))
+        opening = "".join(LAYOUT_WRAPPERS[level % len(LAYOUT_WRAPPERS)] for level in range(depth))
+        parts.append(opening + content + "</div></div>" * depth)
+    return "".join(parts)
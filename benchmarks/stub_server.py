@@ -0,0 +1,117 @@
+"""
+Local stand-in for the Confluence REST and attachment endpoints used by an export, so the
+network stages of the pipeline can be benchmarked without a real instance.
+
+    GET /rest/api/content/<id>                    page JSON with body.view
+    GET /rest/api/content/<id>/child/attachment   one PNG attachment per draw.io diagram, paginated
+    GET /rest/api/content/<id>/child/page         no children
+    GET /download/...                             image_size bytes of PNG data
+
+latency adds a fixed delay (in seconds) to every response.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DIAGRAM_NAME_PATTERN = re.compile(r'id="drawio-macro-data-([^"]+)"')
+MAX_PAGE_SIZE = 50
+
+class StubConfluence:
+    """
+    Threaded HTTP server serving registered pages on 127.0.0.1 (random free port).
+    """
+
+    def __init__(self, image_size=32 * 1024, latency=0.0):
+        self.pages = {}  # page_id -> (title, html)
+        self.image_body = b"\x89PNG\r\n\x1a\n" + b"\0" * max(0, image_size - 8)
+        self.latency = latency
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = None
+
+    def add_page(self, page_id, title, html):
+        self.pages[str(page_id)] = (title, html)
+
+    def attachments(self, page_id):
+        _, html = self.pages[page_id]
+        return [
+            {"id": f"att-{page_id}-{i}", "title": f"{name}.png", "metadata": {"mediaType": "image/png"},
+             "version": {"number": 1}, "_links": {"download": f"/download/attachments/{page_id}/{name}.png?version=1"}}
+            for i, name in enumerate(DIAGRAM_NAME_PATTERN.findall(html))
+        ]
+
+    def handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like Confluence
+
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, data):
+                self.send_body(json.dumps(data).encode("utf-8"), "application/json")
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                match = re.match(r"^/rest/api/content/(\d+)(?:/child/(attachment|page))?$", parsed.path)
+                if match and match.group(1) in stub.pages:
+                    page_id, child = match.groups()
+                    if child == "attachment":
+                        return self.send_json(self.attachment_page(page_id, query))
+                    if child == "page":
+                        return self.send_json({"results": [], "size": 0, "_links": {}})
+                    title, html = stub.pages[page_id]
+                    return self.send_json({"id": page_id, "title": title, "version": {"number": 1},
+                                           "body": {"view": {"value": html}}})
+                if parsed.path.startswith("/download/"):
+                    return self.send_body(stub.image_body, "image/png")
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def attachment_page(self, page_id, query):
+                start = int(query.get("start", ["0"])[0])
+                limit = min(int(query.get("limit", ["25"])[0]), MAX_PAGE_SIZE)
+                items = stub.attachments(page_id)
+                if "filename" in query:
+                    items = [att for att in items if att["title"] == query["filename"][0]]
+                chunk = items[start:start + limit]
+                links = {"base": stub.base_url}
+                if start + limit < len(items):
+                    links["next"] = (f"/rest/api/content/{page_id}/child/attachment"
+                                     f"?start={start + limit}&limit={limit}&mediaType=image/png")
+                return {"results": chunk, "size": len(chunk), "_links": links}
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,44 @@
+"""
+Confluence to Markdown converter.
+
+Library usage (no side effects at import time):
+
+    from c2m import ConfluenceClient, ExportOptions, convert_page
+
+    with ConfluenceClient("https://confluence.example.com", token, cache_dir=".c2m-cache") as client:
+        convert_page("https://confluence.example.com/pages/viewpage.action?pageId=123", client, "out")
+
+The command line interface is `python -m c2m` (see c2m.cli.main).
+Progress is reported through the "c2m" logger; configure logging to see it.
+"""
+import logging
+
+from .cache import ExportManifest, ImageCache, ValidatorStore
+from .client import ConfluenceClient, fetch_json
+from .converter import AssetRequest, ConversionResult, TwoPassConverter, custom_md
+from .assets import resolve_assets
+from .export import ExportOptions, convert_page, export_page, export_page_tree, export_urls
+from .metrics import Metrics
+from .urls import extract_page_info
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+__all__ = [
+    "AssetRequest",
+    "ConfluenceClient",
+    "ConversionResult",
+    "ExportManifest",
+    "ExportOptions",
+    "ImageCache",
+    "Metrics",
+    "TwoPassConverter",
+    "ValidatorStore",
+    "convert_page",
+    "custom_md",
+    "export_page",
+    "export_page_tree",
+    "export_urls",
+    "extract_page_info",
+    "fetch_json",
+    "resolve_assets",
+]
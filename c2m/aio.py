@@ -0,0 +1,193 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .assets import apply_assets, plan_asset_downloads
+from .attachments import get_drawio_attachment, iter_child_pages
+from .client import fetch_json
+from .converter import custom_md, stream_md
+from .downloads import DownloadRegistry, ImageFolders, download_image
+from .export import (ExportOptions, fetch_page, markdown_path, page_images_dir, parse_page_url,
+                     resolve_root_page_id, unchanged_page, write_page, write_streamed_page)
+from .urls import safe_filename
+
+logger = logging.getLogger(__name__)
+
+class AsyncConfluenceClient:
+    """
+    asyncio front-end over the blocking fetch API (fetch_json, fetch_page, get_drawio_attachment,
+    download_image, ...) of a ConfluenceClient. Calls run on a dedicated thread pool, and one
+    global semaphore caps the number of operations in flight across all pages of the run.
+    It lives for one run, and so does its DownloadRegistry: each image URL is downloaded once per run.
+    """
+
+    def __init__(self, client, max_in_flight=100):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.download_registry = DownloadRegistry()
+
+    async def run(self, fn, *args, **kwargs):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def fetch_json(self, url, params=None):
+        return await self.run(fetch_json, self.client, url, params=params)
+
+    async def fetch_page(self, page_id=None, space_key=None, page_title=None, **kwargs):
+        return await self.run(fetch_page, self.client, page_id, space_key, page_title, **kwargs)
+
+    async def get_drawio_attachment(self, content_id, diagram_name=None, attachment_indexes=None):
+        return await self.run(get_drawio_attachment, self.client, content_id, diagram_name=diagram_name,
+                              attachment_indexes=attachment_indexes)
+
+    async def download_image(self, image_url, local_path, **kwargs):
+        return await self.run(download_image, self.client, image_url, local_path,
+                              download_registry=self.download_registry, **kwargs)
+
+    async def download_images(self, image_downloads, **kwargs):
+        """
+        Async counterpart of download_images(); returns the failed (image_url, local_path, error) entries.
+        """
+        planned = [(image_url, local_path, cache_key)
+                   for local_path, (image_url, cache_key) in image_downloads.items()]
+        results = await asyncio.gather(
+            *(self.download_image(image_url, local_path, cache_key=cache_key, **kwargs)
+              for image_url, local_path, cache_key in planned),
+            return_exceptions=True
+        )
+        failed = []
+        for (image_url, local_path, _), outcome in zip(planned, results):
+            if isinstance(outcome, Exception):
+                logger.warning("Error downloading image %s: %s", image_url, outcome)
+                self.client.metrics.increment("download_errors")
+                failed.append((image_url, local_path, outcome))
+        return failed
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+async def export_page_async(aclient, page_id=None, space_key=None, page_title=None, out_dir=".", options=None,
+                            image_folders=None):
+    """
+    asyncio version of export_page(): same stages, with every request scheduled on aclient.
+    """
+    options = options or ExportOptions()
+    image_folders = image_folders or aclient.client.image_folders
+    if options.manifest:
+        version_data = await aclient.fetch_page(page_id, space_key, page_title, expand="version")
+        skipped = unchanged_page(options.manifest, version_data, out_dir, page_title)
+        if skipped:
+            aclient.client.metrics.increment("pages_skipped")
+            return skipped
+
+    result = await aclient.fetch_page(page_id, space_key, page_title)
+    if not result:
+        logger.warning("No page found.")
+        aclient.client.metrics.increment("pages_failed")
+        return None
+
+    page_id = result["id"]
+    if not page_title:
+        page_title = result.get("title", "")
+    images_dir = page_images_dir(out_dir, page_id, options, image_folders)
+
+    # The conversion is CPU-bound and performs no network I/O; the assets are resolved on aclient
+    # afterwards, so every request of the page stays under its max_in_flight cap
+    loop = asyncio.get_running_loop()
+    if options.stream:
+        # stream_md() writes the Markdown, all but its assets, to a .part file next to the page
+        intermediate_path = markdown_path(out_dir, page_title) + ".part"
+        conversion = await loop.run_in_executor(
+            options.convert_pool,
+            functools.partial(stream_md, result["body"]["view"].pop("value"), intermediate_path,
+                              base_url=aclient.client.base_url, parser=options.parser,
+                              output_builder=options.output_builder, header=f"# {page_title}\n\n", page_id=page_id)
+        )
+    else:
+        conversion = await loop.run_in_executor(
+            options.convert_pool,
+            functools.partial(custom_md, result["body"]["view"]["value"], base_url=aclient.client.base_url,
+                              parser=options.parser, output_builder=options.output_builder, page_id=page_id)
+        )
+    aclient.client.metrics.merge(conversion.metrics)
+    downloads, drawio_targets = await aclient.run(plan_asset_downloads, aclient.client, conversion.assets,
+                                                  page_id, images_dir)
+    failed_downloads = await aclient.download_images(downloads, chunk_size=options.chunk_size,
+                                                     max_size=options.max_image_size)
+
+    with aclient.client.metrics.timer("write"):
+        if options.stream:
+            # Copying a large page through apply_assets() is file I/O: keep it off the event loop
+            await loop.run_in_executor(None, write_streamed_page, result, page_title, out_dir, conversion,
+                                       drawio_targets, failed_downloads, options.manifest)
+        else:
+            converted_markdown = apply_assets(conversion.markdown, drawio_targets, failed_downloads, page_id)
+            write_page(result, page_title, out_dir, converted_markdown, options.manifest)
+    aclient.client.metrics.increment("pages_exported")
+    return page_id, page_title
+
+async def export_page_tree_async(aclient, root_page_id, out_dir=".", options=None, image_folders=None):
+    """
+    asyncio version of export_page_tree(): all branches of the tree are exported concurrently.
+    """
+    image_folders = image_folders or aclient.client.image_folders
+
+    async def visit(page_id, page_out_dir):
+        os.makedirs(page_out_dir, exist_ok=True)
+        try:
+            exported = await export_page_async(aclient, page_id=page_id, out_dir=page_out_dir, options=options,
+                                               image_folders=image_folders)
+            if not exported:
+                return 0
+            children = await aclient.run(lambda: list(iter_child_pages(aclient.client, page_id)))
+        except Exception as e:
+            logger.error("Error exporting page %s: %s", page_id, e)
+            aclient.client.metrics.increment("pages_failed")
+            return 0
+        children_dir = os.path.join(page_out_dir, safe_filename(exported[1]))
+        counts = await asyncio.gather(*(visit(child["id"], children_dir) for child in children))
+        return 1 + sum(counts)
+
+    return await visit(root_page_id, out_dir)
+
+async def export_urls_async(client, page_urls, out_dir=".", options=None, recursive=False, max_in_flight=100):
+    """
+    Export all page URLs (and, with recursive, their page trees) concurrently on one event loop.
+    As with export_urls(), a URL listed twice is exported once.
+    """
+    page_urls = list(dict.fromkeys(page_urls))
+    aclient = AsyncConfluenceClient(client, max_in_flight=max_in_flight)
+    image_folders = ImageFolders()
+    os.makedirs(out_dir, exist_ok=True)
+
+    async def export_one(page_url):
+        page_info = parse_page_url(client, page_url)
+        if not page_info:
+            client.metrics.increment("pages_failed")
+            return
+        space_key, page_title, page_id = page_info
+        if recursive:
+            root_page_id = await aclient.run(resolve_root_page_id, client, page_id, space_key, page_title)
+            if root_page_id:
+                count = await export_page_tree_async(aclient, root_page_id, out_dir=out_dir, options=options,
+                                                     image_folders=image_folders)
+                logger.info("Exported %d page(s) to %s", count, out_dir)
+            else:
+                logger.warning("No page found.")
+                client.metrics.increment("pages_failed")
+        else:
+            await export_page_async(aclient, page_id, space_key, page_title, out_dir=out_dir, options=options,
+                                    image_folders=image_folders)
+
+    try:
+        results = await asyncio.gather(*(export_one(page_url) for page_url in page_urls), return_exceptions=True)
+        for page_url, outcome in zip(page_urls, results):
+            if isinstance(outcome, Exception):
+                logger.error("Error exporting %s: %s", page_url, outcome)
+                client.metrics.increment("pages_failed")
+    finally:
+        aclient.close()
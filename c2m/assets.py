@@ -0,0 +1,87 @@
+import os
+from urllib.parse import urlparse, unquote
+
+from .attachments import get_drawio_attachment
+from .downloads import DOWNLOAD_CHUNK_SIZE, download_images, restore_remote_image_links
+from .urls import images_folder
+
+def drawio_markdown(att_title, image_path, width_px=None, height_px=None):
+    """
+    Markdown image for a draw.io diagram (image_path relative to the page), with its size as an
+    attribute list if known.
+    """
+    md_str = f"![{att_title}](./{image_path})"
+    style_parts = []
+    if width_px:
+        style_parts.append(f"width: {width_px}px;")
+    if height_px:
+        style_parts.append(f"height: {height_px}px;")
+    if style_parts:
+        style_str = " ".join(style_parts)
+        md_str += f'{{: style="{style_str}"}}'
+    return md_str
+
+def plan_asset_downloads(client, assets, page_id, images_dir):
+    """
+    First half of the asset-resolution stage: looks up the draw.io attachments of the page.
+    Returns (downloads, drawio_targets): downloads maps local_path -> (url, cache_key) for
+    download_images(); drawio_targets maps each draw.io placeholder to either
+    (local_path, markdown) or an error text.
+    The attachment listing is fetched once per call, shared by all draw.io macros of the page.
+    """
+    downloads = {}
+    drawio_targets = {}
+    attachment_indexes = {}
+    for asset in assets:
+        if asset.kind == "image":
+            downloads.setdefault(os.path.join(images_dir, asset.local_filename), (asset.url, asset.cache_key))
+            continue
+
+        try:
+            download_url, att_title, cache_key = get_drawio_attachment(
+                client, page_id, diagram_name=asset.diagram_name, attachment_indexes=attachment_indexes
+            )
+        except Exception as e:
+            drawio_targets[asset.placeholder] = f"[Error looking up draw.io attachment: {e}]"
+            continue
+        if not download_url:
+            drawio_targets[asset.placeholder] = "[Drawio diagram attachment not found]"
+            continue
+
+        local_filename = unquote(os.path.basename(urlparse(download_url).path))
+        local_path = os.path.join(images_dir, local_filename)
+        downloads.setdefault(local_path, (download_url, cache_key))
+        drawio_targets[asset.placeholder] = (
+            local_path, drawio_markdown(att_title, f"{images_folder(page_id)}/{local_filename}", asset.width,
+                                        asset.height)
+        )
+    return downloads, drawio_targets
+
+def apply_assets(markdown_text, drawio_targets, failed_downloads, page_id=None):
+    """
+    Second half of the asset-resolution stage: fills the draw.io placeholders and points
+    images that failed to download back at their remote URL.
+    """
+    markdown_text = restore_remote_image_links(markdown_text, failed_downloads, page_id)
+    download_errors = {local_path: error for _, local_path, error in failed_downloads}
+    for placeholder, target in drawio_targets.items():
+        if isinstance(target, str):
+            replacement = target
+        elif target[0] in download_errors:
+            replacement = f"[Error downloading draw.io attachment: {download_errors[target[0]]}]"
+        else:
+            replacement = target[1]
+        markdown_text = markdown_text.replace(placeholder, replacement)
+    return markdown_text
+
+def resolve_assets(client, conversion, page_id, images_dir, workers=8, chunk_size=DOWNLOAD_CHUNK_SIZE, max_size=None,
+                   download_registry=None):
+    """
+    Asset-resolution stage for a ConversionResult: resolves and downloads every requested
+    asset into images_dir and returns the final Markdown.
+    download_registry (see DownloadRegistry) shares the downloads of an export run across its pages.
+    """
+    downloads, drawio_targets = plan_asset_downloads(client, conversion.assets, page_id, images_dir)
+    failed_downloads = download_images(client, downloads, workers=workers, chunk_size=chunk_size, max_size=max_size,
+                                       download_registry=download_registry)
+    return apply_assets(conversion.markdown, drawio_targets, failed_downloads, page_id)
@@ -0,0 +1,96 @@
+import logging
+
+from .cache import attachment_cache_key
+from .client import iter_results
+
+logger = logging.getLogger(__name__)
+
+class AttachmentIndex:
+    """
+    All attachments of one page, fetched once and indexed by (title, mediaType)
+    so every draw.io macro on the page resolves its PNG with a dict lookup.
+    """
+
+    def __init__(self, attachments):
+        self.attachments = list(attachments)
+        self.by_title = {}
+        self.by_media_type = {}
+        for att in self.attachments:
+            media_type = att["metadata"].get("mediaType")
+            self.by_title.setdefault((att["title"], media_type), att)
+            self.by_media_type.setdefault(media_type, []).append(att)
+
+    def find(self, title, media_type):
+        return self.by_title.get((title, media_type))
+
+    def first(self, media_type):
+        matches = self.by_media_type.get(media_type)
+        return matches[0] if matches else None
+
+# Page size requested from paginated REST endpoints (the server caps it if needed)
+ATTACHMENT_PAGE_LIMIT = 200
+
+def iter_attachments(client, content_id, media_type=None, filename=None, limit=ATTACHMENT_PAGE_LIMIT):
+    """
+    Yield every attachment of a page, following the _links.next pagination links.
+    media_type and filename are passed to the REST API so the filtering happens server-side.
+    """
+    params = {"expand": "version,container", "limit": limit}
+    if media_type:
+        params["mediaType"] = media_type
+    if filename:
+        params["filename"] = filename
+    yield from iter_results(client, f"{client.content_api}/{content_id}/child/attachment", params)
+
+def iter_child_pages(client, content_id, limit=ATTACHMENT_PAGE_LIMIT):
+    """
+    Yield the direct child pages (id and title) of a page.
+    """
+    yield from iter_results(client, f"{client.content_api}/{content_id}/child/page", {"limit": limit})
+
+def get_attachment_index(client, content_id, media_type="image/png", attachment_indexes=None):
+    """
+    Return the AttachmentIndex of a page, fetching the attachment listing only on first use.
+    attachment_indexes maps (content_id, media_type) -> AttachmentIndex; it is meant to live for
+    one export of the page only, so a new attachment version is seen by the next export.
+    """
+    if attachment_indexes is None:
+        return AttachmentIndex(iter_attachments(client, content_id, media_type=media_type))
+    key = (content_id, media_type)
+    index = attachment_indexes.get(key)
+    if index is None:
+        index = AttachmentIndex(iter_attachments(client, content_id, media_type=media_type))
+        attachment_indexes[key] = index
+    else:
+        client.metrics.increment("attachment_index_hits")
+    return index
+
+def attachment_version_key(attachment):
+    """
+    Cache key of an attachment from the REST API (requested with expand=version).
+    """
+    return attachment_cache_key(attachment.get("id"), attachment.get("version", {}).get("number"))
+
+def get_drawio_attachment(client, content_id, diagram_name=None, attachment_indexes=None):
+    """
+    Looking for .png attachments that match a diagram_name.
+    Returns (download_url, title, cache_key), or (None, None, None) if the page has no PNG attachment.
+    attachment_indexes is passed to get_attachment_index(), so all macros of a page share one listing.
+    """
+    index = get_attachment_index(client, content_id, attachment_indexes=attachment_indexes)
+
+    first = index.first("image/png")
+    if not first:
+        return None, None, None
+
+    if diagram_name:
+        for title in (diagram_name + ".png", diagram_name + ".drawio.png"):
+            att = index.find(title, "image/png")
+            if att:
+                dl_link = att["_links"]["download"]
+                return client.base_url + dl_link, att["title"], attachment_version_key(att)
+        logger.warning("No PNG matched %s, returning the first found.", diagram_name)
+
+    # fallback: first
+    dl_link = first["_links"]["download"]
+    return client.base_url + dl_link, first["title"], attachment_version_key(first)
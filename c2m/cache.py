@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+
+from .downloads import link_or_copy
+
+class ImageCache:
+    """
+    Persistent, content-addressed image store shared across runs.
+    Files live in <cache_dir>/objects/<sha256 of content>; index.json maps a cache key
+    (attachment id + version) to the content hash, so an unchanged attachment is
+    restored with a hardlink (or copy) instead of being downloaded again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def has(self, key):
+        with self.lock:
+            digest = self.index.get(key)
+        return bool(digest) and os.path.exists(self._object_path(digest))
+
+    def restore(self, key, local_path):
+        """
+        Place the cached file for key at local_path. Returns False on a cache miss.
+        """
+        with self.lock:
+            digest = self.index.get(key)
+        if not digest or not os.path.exists(self._object_path(digest)):
+            return False
+        link_or_copy(self._object_path(digest), local_path)
+        return True
+
+    def store(self, key, local_path):
+        """
+        Add a freshly downloaded file to the cache under key.
+        """
+        sha = hashlib.sha256()
+        with open(local_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            link_or_copy(local_path, object_path)
+        with self.lock:
+            self.index[key] = digest
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.index_path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+
+class ValidatorStore:
+    """
+    Small persistent metadata store of HTTP validators (ETag / Last-Modified) per URL.
+    Later runs send them as If-None-Match / If-Modified-Since and treat a 304 as a cache hit.
+    JSON bodies (the page fetch) are kept next to it, since a 304 carries no body.
+    """
+
+    def __init__(self, cache_dir):
+        self.path = os.path.join(cache_dir, "validators.json")
+        self.bodies_dir = os.path.join(cache_dir, "responses")
+        self.lock = threading.Lock()
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.validators = json.load(f)
+        except (OSError, ValueError):
+            self.validators = {}
+
+    def request_headers(self, url):
+        """
+        Conditional request headers for url (empty if nothing was recorded yet).
+        """
+        with self.lock:
+            validators = self.validators.get(url, {})
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def update(self, url, response):
+        """
+        Record the validators of a response; returns True if it had any.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self.lock:
+            if etag or last_modified:
+                self.validators[url] = {"etag": etag, "last_modified": last_modified}
+                return True
+            self.validators.pop(url, None)
+            return False
+
+    def _body_path(self, url):
+        return os.path.join(self.bodies_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def load_body(self, url):
+        try:
+            with open(self._body_path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def drop_body(self, url):
+        try:
+            os.unlink(self._body_path(url))
+        except OSError:
+            pass
+
+    def store_body(self, url, data):
+        body_path = self._body_path(url)
+        # Unique per thread: the same URL may be fetched by several threads at once
+        tmp_path = f"{body_path}.{threading.get_ident()}.part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, body_path)
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.validators, f)
+            os.replace(tmp_path, self.path)
+
+class ExportManifest:
+    """
+    Records, per page id, the Confluence version and a hash of the Markdown written for it,
+    so incremental runs can skip pages that have not changed since the last export.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.pages = json.load(f)
+        except (OSError, ValueError):
+            self.pages = {}
+
+    @staticmethod
+    def hash_markdown(markdown_content):
+        return hashlib.sha256(markdown_content.encode("utf-8")).hexdigest()
+
+    def is_up_to_date(self, page_id, version, file_path=None):
+        """
+        True if page_id was exported at this version and its Markdown file is still intact
+        (and, if given, is file_path).
+        """
+        with self.lock:
+            entry = self.pages.get(str(page_id))
+        if not entry or entry.get("version") != version:
+            return False
+        if file_path and os.path.normpath(entry["file"]) != os.path.normpath(file_path):
+            return False
+        try:
+            with open(entry["file"], encoding="utf-8") as f:
+                return self.hash_markdown(f.read()) == entry.get("sha256")
+        except OSError:
+            return False
+
+    def record(self, page_id, version, title, file_path, markdown_content=None, sha256=None):
+        """
+        Record an exported page; pass either its Markdown or the sha256 hex digest of it.
+        """
+        with self.lock:
+            self.pages[str(page_id)] = {
+                "version": version,
+                "title": title,
+                "file": file_path,
+                "sha256": sha256 or self.hash_markdown(markdown_content)
+            }
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.pages, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+def attachment_cache_key(attachment_id, version):
+    """
+    Cache key of one version of an attachment, or None if either part is unknown.
+    """
+    if not attachment_id or not version:
+        return None
+    return f"attachment:{attachment_id}:v{version}"
@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from getpass import getpass
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import urlparse
+
+import urllib3
+
+from .aio import export_urls_async
+from .cache import ExportManifest
+from .client import ConfluenceClient
+from .converter import HTML_PARSERS, available_parsers
+from .downloads import DOWNLOAD_CHUNK_SIZE
+from .export import ExportOptions, export_urls
+
+logger = logging.getLogger(__name__)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Confluence to Markdown Converter")
+    # Flag to force manual input
+    parser.add_argument(
+        '--manual',
+        action='store_true',
+        help='Force manual input even if environment variables are set'
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        default=10,
+        help='Maximum number of pooled keep-alive connections to the Confluence host (default: 10)'
+    )
+    parser.add_argument(
+        '--download-workers',
+        type=int,
+        default=8,
+        help='Number of images downloaded in parallel (default: 8)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DOWNLOAD_CHUNK_SIZE,
+        help='Chunk size in bytes used when streaming downloads to disk (default: 65536)'
+    )
+    parser.add_argument(
+        '--max-image-size',
+        type=int,
+        default=None,
+        help='Skip images and attachments larger than this many bytes (default: no limit)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default='.c2m-cache',
+        help='Directory of the persistent image cache shared across runs (default: .c2m-cache)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the image cache and conditional requests; always download everything'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Skip pages whose Confluence version has not changed since the last export'
+    )
+    parser.add_argument(
+        '--manifest',
+        default='.c2m-manifest.json',
+        help='Manifest of exported page versions used by --incremental (default: .c2m-manifest.json)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default='.',
+        help='Directory the Markdown files and images are written to (default: current directory)'
+    )
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        help='Export the page and all of its descendants, mirroring the page tree in directories'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Number of pages fetched and converted in parallel with --recursive or --urls-file (default: 4)'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'asyncio'],
+        default='threads',
+        help='Concurrency engine for fetching pages and attachments (default: threads)'
+    )
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=100,
+        help='Maximum number of requests in flight at once with --engine asyncio (default: 100)'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Maximum number of requests per second sent to Confluence (default: unlimited)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=5,
+        help='Retries for throttled (429/503), failed (502/504) or dropped requests, with exponential backoff (default: 5)'
+    )
+    parser.add_argument(
+        '--max-retry-after',
+        type=float,
+        default=600.0,
+        help='Longest Retry-After (in seconds) waited for; a request asked to wait longer fails (default: 600)'
+    )
+    parser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=10.0,
+        help='Seconds to wait for a connection to Confluence before retrying (default: 10)'
+    )
+    parser.add_argument(
+        '--read-timeout',
+        type=float,
+        default=60.0,
+        help='Seconds to wait for data on an open connection before retrying (default: 60)'
+    )
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Halve the number of concurrent requests whenever Confluence throttles, and grow it back slowly'
+    )
+    parser.add_argument(
+        '--convert-processes',
+        type=int,
+        default=0,
+        help='Convert pages in a pool of this many processes, for multi-page exports (default: 0, convert in-thread)'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=HTML_PARSERS,
+        default=None,
+        help='HTML parser used for the conversion (default: the fastest installed, lxml if available)'
+    )
+    parser.add_argument(
+        '--output-builder',
+        action='store_true',
+        help='Build the Markdown from fragment lists instead of concatenating strings at every node, '
+             'then collapse runs of blank lines (faster on deeply nested layouts)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Write the Markdown of each page block by block while converting it, '
+             'instead of building it in memory first (for very large pages)'
+    )
+    parser.add_argument(
+        '--urls-file',
+        help='Export every page URL listed in this file, one per line ("-" reads the URLs from stdin)'
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Only log warnings and errors'
+    )
+    verbosity.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Also log every request, image and diagram (debug level)'
+    )
+    parser.add_argument(
+        '--metrics-json',
+        metavar='PATH',
+        help='Write a JSON summary of stage timings and counters at the end of the run ("-" prints it)'
+    )
+    parser.add_argument(
+        '--metrics-prom',
+        metavar='PATH',
+        help='Write the same metrics as a Prometheus node_exporter textfile (e.g. c2m.prom)'
+    )
+    return parser
+
+def read_page_urls(urls_file):
+    """
+    Read page URLs from a file (or stdin for "-"), one per line; blank lines and # comments are ignored.
+    """
+    if urls_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(urls_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+def log_level(args):
+    if args.quiet:
+        return logging.WARNING
+    return logging.DEBUG if args.verbose else logging.INFO
+
+def attach_queue_handler(log_queue, level):
+    """
+    Send the records of the c2m loggers to log_queue instead of writing them in the calling thread.
+    Also the initializer of the conversion worker processes, so their records reach the same listener.
+    """
+    package_logger = logging.getLogger("c2m")
+    package_logger.setLevel(level)
+    package_logger.addHandler(QueueHandler(log_queue))
+    package_logger.propagate = False
+
+def start_logging(level, log_queue):
+    """
+    Log to stderr through a queue: the export, download and conversion threads only enqueue
+    records, and a single listener thread formats and writes them.
+    Returns the QueueListener, to be stopped (and flushed) at the end of the run.
+    """
+    handler = logging.StreamHandler()
+    if level == logging.DEBUG:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(processName)s/%(threadName)s] %(message)s"
+        ))
+    else:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    attach_queue_handler(log_queue, level)
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.parser and args.parser not in available_parsers():
+        parser.error(f"the {args.parser} parser is not installed (pip install {args.parser})")
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    level = log_level(args)
+    # Records of the conversion worker processes can only travel through a multiprocessing queue
+    if args.convert_processes > 0:
+        log_queue = multiprocessing.get_context("spawn").Queue()
+    else:
+        log_queue = queue.SimpleQueue()
+    listener = start_logging(level, log_queue)
+    try:
+        run_export(args, level, log_queue)
+    finally:
+        listener.stop()
+
+def run_export(args, level, log_queue):
+    if args.manual:
+        page_url = None if args.urls_file else input("Enter the Confluence page URL: ")
+        bearer_token = getpass("Enter your Confluence API token: ")
+    else:
+        page_url = os.getenv('PAGE_URL')
+        bearer_token = os.getenv('BEARER_TOKEN')
+        if not (page_url or args.urls_file) or not bearer_token:
+            logger.error("No environment variables found.")
+            logger.error("Please set the PAGE_URL and BEARER_TOKEN environment variables or use --manual.")
+            sys.exit(1)
+
+    page_urls = read_page_urls(args.urls_file) if args.urls_file else [page_url]
+    if not page_urls:
+        logger.error("No page URLs given.")
+        sys.exit(1)
+
+    parsed_url = urlparse(page_urls[0])
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    logger.info("Detected BASE_URL: %s", base_url)
+
+    # The asyncio engine keeps up to --max-in-flight requests open, so the pool must be at least as large
+    pool_size = max(args.pool_size, args.max_in_flight) if args.engine == "asyncio" else args.pool_size
+    client = ConfluenceClient(base_url, bearer_token, pool_size=pool_size, rate_limit=args.rate_limit,
+                              max_retries=args.max_retries, adaptive=args.adaptive,
+                              cache_dir=None if args.no_cache else args.cache_dir,
+                              connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                              max_retry_after=args.max_retry_after)
+
+    manifest = ExportManifest(args.manifest) if args.incremental else None
+    # "spawn" keeps the worker processes independent of the download and export threads of this one
+    convert_pool = None
+    if args.convert_processes > 0:
+        convert_pool = ProcessPoolExecutor(max_workers=args.convert_processes,
+                                           mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=attach_queue_handler, initargs=(log_queue, level))
+    options = ExportOptions(download_workers=args.download_workers, chunk_size=args.chunk_size,
+                            max_image_size=args.max_image_size, manifest=manifest, workers=args.workers,
+                            convert_pool=convert_pool, parser=args.parser, output_builder=args.output_builder,
+                            stream=args.stream)
+
+    try:
+        with client.metrics.timer("run"):
+            if args.engine == "asyncio":
+                asyncio.run(export_urls_async(client, page_urls, out_dir=args.output_dir, options=options,
+                                              recursive=args.recursive, max_in_flight=args.max_in_flight))
+            else:
+                export_urls(client, page_urls, out_dir=args.output_dir, options=options, recursive=args.recursive)
+    finally:
+        if convert_pool:
+            convert_pool.shutdown()
+        if manifest:
+            manifest.save()
+        client.close()
+        if args.metrics_json:
+            client.metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            client.metrics.write_prometheus(args.metrics_prom)
+
+    # Failed pages are only logged while the run goes on; unattended (cron) runs need the exit status
+    failed = client.metrics.counter("pages_failed")
+    if failed:
+        logger.error("%d page(s) failed to export.", failed)
+        sys.exit(1)
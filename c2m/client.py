@@ -0,0 +1,286 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ImageCache, ValidatorStore
+from .downloads import ImageFolders
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by all threads: on average `rate` requests per second,
+    with bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to throttling (AIMD): it is halved whenever Confluence
+    answers 429/503 and grows back by one after `increase_after` successful requests.
+    """
+
+    def __init__(self, max_limit, min_limit=1, increase_after=20):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = self.max_limit
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def on_throttle(self):
+        with self.condition:
+            new_limit = max(self.min_limit, self.limit // 2)
+            if new_limit < self.limit:
+                logger.warning("Throttled by Confluence, reducing concurrency to %d", new_limit)
+            self.limit = new_limit
+            self.successes = 0
+
+    def on_success(self):
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify()
+
+class ConfluenceClient:
+    """
+    Shared HTTP client for all Confluence calls.
+    Wraps a single requests.Session with a pooled HTTPAdapter, so page fetches,
+    attachment listings and image downloads reuse keep-alive connections
+    instead of opening a fresh TCP+TLS connection per request.
+    Every request also goes through the optional rate limiter and adaptive concurrency
+    limit, and throttled (429/503) or failed requests are retried with exponential backoff.
+    A Retry-After is always honored in full; a request asked to wait longer than max_retry_after
+    seconds is not retried but fails with its response.
+    Requests time out after connect_timeout seconds without a connection and read_timeout
+    seconds without data, so a stalled connection is retried instead of blocking forever.
+    The client also owns the per-process caches (image cache, HTTP validators), so a long-lived
+    client keeps them warm across conversions, and the images folders
+    prepared by them, so each folder is only cleared the first time a page is written to it.
+    """
+
+    # Responses that are retried (honoring Retry-After when the server sends it)
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+    # Responses that mean "slow down" and shrink the adaptive concurrency limit
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(self, base_url, bearer_token, pool_size=10, rate_limit=None, max_retries=5,
+                 backoff_base=1.0, max_backoff=60.0, adaptive=False, cache_dir=None, connect_timeout=10.0,
+                 read_timeout=60.0, max_retry_after=600.0):
+        self.base_url = base_url.rstrip("/")
+        self.content_api = f"{self.base_url}/rest/api/content"
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {bearer_token}",
+            "Accept": "application/json",
+            "Connection": "keep-alive"
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.concurrency = AdaptiveConcurrency(pool_size) if adaptive else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.timeout = (connect_timeout, read_timeout)  # requests' (connect, read) timeout
+        # Persistent image cache and HTTP validators (None disables caching)
+        self.image_cache = ImageCache(cache_dir) if cache_dir else None
+        self.validator_store = ValidatorStore(cache_dir) if cache_dir else None
+        # Images folders prepared by exports that do not bring their own (e.g. convert_page())
+        self.image_folders = ImageFolders()
+        # Timers and counters of everything done with this client (see c2m.metrics)
+        self.metrics = Metrics()
+
+    def retry_delay(self, attempt, response=None):
+        """
+        Seconds to wait before retry number `attempt` (0-based): Retry-After if present (not
+        capped: the server decides), else exponential backoff with jitter capped at max_backoff.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        delay = min(self.max_backoff, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def release_on_close(self, response):
+        """
+        Hold the concurrency slot of a streamed response until it is closed (at the end of its
+        with block, or when it is retried), rather than releasing it when the headers arrive.
+        Streamed responses must therefore always be closed.
+        """
+        close = response.close
+        released = False
+
+        def close_and_release():
+            nonlocal released
+            try:
+                close()
+            finally:
+                if not released:
+                    released = True
+                    self.concurrency.release()
+
+        response.close = close_and_release
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            if self.concurrency:
+                self.concurrency.acquire()
+            self.metrics.increment("requests")
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if self.concurrency:
+                    self.concurrency.release()
+                if attempt >= self.max_retries:
+                    raise
+                self.metrics.increment("retries")
+                delay = self.retry_delay(attempt)
+                logger.warning("Request to %s failed, retrying in %.1fs", url, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                if self.concurrency:
+                    self.concurrency.release()
+                raise
+            if self.concurrency:
+                if kwargs.get("stream"):
+                    # Only the headers have arrived: the body transfer still counts against the limit
+                    self.release_on_close(response)
+                else:
+                    self.concurrency.release()
+
+            if response.status_code in self.RETRY_STATUS_CODES and attempt < self.max_retries:
+                if response.status_code in self.THROTTLE_STATUS_CODES:
+                    self.metrics.increment("throttled")
+                    if self.concurrency:
+                        self.concurrency.on_throttle()
+                delay = self.retry_delay(attempt, response)
+                if delay > self.max_retry_after:
+                    logger.warning("Got HTTP %d for %s, asked to wait %.0fs (more than %.0fs), giving up",
+                                   response.status_code, url, delay, self.max_retry_after)
+                    return response
+                self.metrics.increment("retries")
+                logger.warning("Got HTTP %d for %s, retrying in %.1fs", response.status_code, url, delay)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if self.concurrency and response.ok:
+                self.concurrency.on_success()
+            return response
+
+    def save_caches(self):
+        if self.image_cache:
+            self.image_cache.save()
+        if self.validator_store:
+            self.validator_store.save()
+
+    def close(self):
+        self.save_caches()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def fetch_json(client, url, params=None):
+    """
+    GET a JSON resource, revalidating a previously fetched copy with a conditional request.
+    Bodies are only kept (and read back) for responses that carried validators.
+    """
+    if params:
+        url = f"{url}?{urlencode(params)}"
+    validator_store = client.validator_store
+    request_headers = validator_store.request_headers(url) if validator_store else {}
+    cached = validator_store.load_body(url) if request_headers else None
+    if cached is None:
+        request_headers = {}
+
+    response = client.get(url, headers=request_headers)
+    if response.status_code == 304:
+        logger.debug("Not modified, using cached response: %s", url)
+        client.metrics.increment("response_cache_hits")
+        return cached
+    response.raise_for_status()
+    client.metrics.increment("bytes_fetched", len(response.content))
+    data = response.json()
+    if validator_store:
+        if validator_store.update(url, response):
+            validator_store.store_body(url, data)
+        elif request_headers:
+            validator_store.drop_body(url)  # the resource no longer sends validators
+    return data
+
+def iter_results(client, url, params=None):
+    """
+    Yield the "results" of a paginated REST collection, following the _links.next links.
+    """
+    while url:
+        page_data = fetch_json(client, url, params=params)
+        yield from page_data.get("results", [])
+
+        links = page_data.get("_links", {})
+        next_link = links.get("next")
+        if not next_link:
+            break
+        if not next_link.startswith("http"):
+            next_link = links.get("base", client.base_url).rstrip("/") + next_link
+        url = next_link
+        params = None  # the next link already carries the query string
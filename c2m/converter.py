@@ -0,0 +1,630 @@
+import base64
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import namedtuple
+from urllib.parse import urlparse, unquote
+
+from bs4 import BeautifulSoup, Comment, Doctype, NavigableString
+from markdownify import (MarkdownConverter, html_heading_re, should_remove_whitespace_inside,
+                         should_remove_whitespace_outside)
+
+from .cache import attachment_cache_key
+from .headings import HeadingIndex, heading_title, slugify
+from .metrics import Metrics
+from .urls import images_folder
+
+logger = logging.getLogger(__name__)
+
+# BeautifulSoup tree builders in order of preference (fastest first)
+HTML_PARSERS = ("lxml", "html.parser", "html5lib")
+
+def available_parsers():
+    """
+    The HTML_PARSERS whose backing library is installed.
+    """
+    available = []
+    for parser in HTML_PARSERS:
+        try:
+            BeautifulSoup("", parser)
+        except Exception:  # bs4.FeatureNotFound
+            continue
+        available.append(parser)
+    return available
+
+def default_parser():
+    """
+    Fastest installed BeautifulSoup parser: lxml if available, else the built-in html.parser.
+    """
+    return available_parsers()[0]
+
+# An asset the converted Markdown depends on, resolved after the conversion by resolve_assets():
+#   kind="image":  download url to images/<page_id>/<local_filename> (see images_folder())
+#   kind="drawio": look up the PNG attachment of diagram_name and put it in place of placeholder
+AssetRequest = namedtuple(
+    "AssetRequest",
+    ["kind", "url", "local_filename", "cache_key", "diagram_name", "placeholder", "width", "height"]
+)
+
+# Tags converted by the heading pre-scan (see TwoPassConverter.prescan_headings())
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+
+# Options of one TOC macro, from its data-* attributes: heading levels min_level..max_level,
+# and optional include / exclude regular expressions matched against the whole heading text
+TocOptions = namedtuple("TocOptions", ["min_level", "max_level", "include", "exclude"])
+
+# Placeholder left by convert_div() for TOC macro number n, filled in by finalize_toc()
+# (or as the block is written, by convert_stream())
+TOC_PLACEHOLDER_PATTERN = re.compile(r"<<<TOC-(\d+)>>>")
+
+def toc_options(el):
+    """
+    TocOptions of a TOC macro element. data-minlevel / data-maxlevel take precedence over
+    data-headerelements (e.g. "H1,H2,H3"); the default is every level.
+    """
+    attrs = el.attrs
+    header_levels = [
+        int(element.strip()[1:]) for element in attrs.get("data-headerelements", "").split(",")
+        if re.fullmatch(r"[hH][1-6]", element.strip())
+    ]
+    min_level = attrs.get("data-minlevel", "").strip()
+    max_level = attrs.get("data-maxlevel", "").strip()
+    return TocOptions(
+        int(min_level) if min_level.isdigit() else min(header_levels, default=1),
+        int(max_level) if max_level.isdigit() else max(header_levels, default=6),
+        attrs.get("data-include") or None,
+        attrs.get("data-exclude") or None,
+    )
+
+def compile_toc_filter(pattern):
+    """
+    Compiled include/exclude pattern of a TOC macro, or None if there is none or it is invalid.
+    """
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        logger.warning("Ignoring invalid TOC filter %r: %s", pattern, e)
+        return None
+
+# Links that are used as they are; other hrefs are relative to the Confluence base URL
+ABSOLUTE_URL_PATTERN = re.compile(r"^(https?://|mailto:)")
+DRAWIO_WIDTH_PATTERN = re.compile(r"width:(\d+)px")
+DRAWIO_HEIGHT_PATTERN = re.compile(r"height:(\d+)px")
+
+# A fenced code block (left untouched) or a run of blank lines (collapsed to one)
+BLANK_LINES_PATTERN = re.compile(r"(^```.*?^```)|\n{3,}", re.MULTILINE | re.DOTALL)
+
+def collapse_blank_lines(text):
+    """
+    Collapse runs of blank lines into one, outside of fenced code blocks, in a single pass.
+    """
+    return BLANK_LINES_PATTERN.sub(lambda match: match.group(1) or "\n\n", text)
+
+class BlankLineCollapser:
+    """
+    Streaming collapse_blank_lines(): feed() it consecutive chunks of the text and it returns
+    them with runs of blank lines collapsed, keeping track of fenced code blocks and of the
+    newlines at the end of the previous chunk.
+    """
+
+    def __init__(self):
+        self.in_fence = False
+        self.at_line_start = True
+        self.newline_run = 0  # newlines at the end of the text returned so far
+
+    def feed(self, text):
+        lines = []
+        start = 0
+        while start < len(text):
+            end = text.find("\n", start)
+            line = text[start:] if end < 0 else text[start:end + 1]
+            start += len(line)
+            line_start = self.at_line_start
+            self.at_line_start = line.endswith("\n")
+            if line_start and line.startswith("```"):
+                self.in_fence = not self.in_fence
+            elif line_start and line == "\n" and not self.in_fence:
+                self.newline_run += 1
+                if self.newline_run <= 2:
+                    lines.append(line)
+                continue
+            self.newline_run = 1 if self.at_line_start else 0
+            lines.append(line)
+        return "".join(lines)
+
+def pop_trailing_newlines(fragments):
+    """
+    Strip the newlines at the end of a list of output fragments, in place; returns how many there were.
+    """
+    count = 0
+    while fragments:
+        stripped = fragments[-1].rstrip("\n")
+        count += len(fragments[-1]) - len(stripped)
+        if stripped:
+            fragments[-1] = stripped
+            break
+        fragments.pop()
+    return count
+
+def pop_leading_newlines(fragments):
+    """
+    Strip the newlines at the start of a list of output fragments, in place; returns how many there were.
+    """
+    count = 0
+    start = 0
+    while start < len(fragments):
+        stripped = fragments[start].lstrip("\n")
+        count += len(fragments[start]) - len(stripped)
+        if stripped:
+            fragments[start] = stripped
+            break
+        start += 1
+    del fragments[:start]
+    return count
+
+# Output of the offline conversion: Markdown (with draw.io placeholders) plus the assets it needs,
+# and a Metrics.snapshot() of the parse, convert_* handler and finalize_toc timings
+ConversionResult = namedtuple("ConversionResult", ["markdown", "assets", "metrics"], defaults=(None,))
+
+# Output of the streaming conversion (stream_md()): the Markdown is in the file at path, TOCs
+# included but draw.io placeholders still in place, and sha256 is the hex digest of the file
+StreamedConversion = namedtuple("StreamedConversion", ["path", "assets", "sha256", "metrics"])
+
+def splice_tocs(text, tocs):
+    """
+    Replace every TOC placeholder <<<TOC-n>>> of text with tocs[n], in a single pass: the text is
+    split at the placeholders and joined once. Numbers with no TOC (e.g. a literal "<<<TOC-7>>>"
+    in the page text) are left untouched.
+    """
+    if not tocs:
+        return text
+    # split() alternates text and the captured placeholder number: [text, "0", text, "1", text]
+    parts = TOC_PLACEHOLDER_PATTERN.split(text)
+    for i in range(1, len(parts), 2):
+        number = int(parts[i])
+        parts[i] = tocs[number] if number < len(tocs) else f"<<<TOC-{parts[i]}>>>"
+    return "".join(parts)
+
+class TwoPassConverter(MarkdownConverter):
+    """
+    A custom converter that:
+      1) Collects headings (H1..H6).
+      2) Replaces <div data-macro-name="toc"> with a placeholder (e.g. <<<TOC-0>>>)
+         and records the macro's TocOptions.
+      3) Replaces <div data-macro-name="drawio"> with a placeholder (e.g. <<<DRAWIO-0>>>)
+         that resolve_assets() later fills with the relevant diagram PNG.
+      4) Rewrites <img> sources to local paths, in the images folder of page_id.
+      5) After the entire parse, we do a second pass to fill in the actual TOC(s).
+    The converter performs no network I/O: images and diagrams are only recorded
+    as AssetRequest entries in self.assets.
+    Every convert_* handler is timed in self.metrics (exclusive of its children, which
+    markdownify converts before calling the handler).
+    With output_builder=True the output is built from lists of fragments instead of by string
+    concatenation at every node (see _process_fragments()), and custom_md() collapses the
+    blank lines of the result.
+    """
+
+    # Entry points rather than per-tag handlers; not timed
+    UNTIMED_METHODS = ("convert", "convert_soup", "convert_stream")
+    # data-macro-name values that convert_div() handles; other divs only wrap their content
+    DIV_MACROS = ("drawio", "toc")
+
+    def __init__(self, base_url="", parser=None, output_builder=False, page_id=None, **options):
+        super().__init__(**options)
+        self.base_url = base_url.rstrip("/")  # prefix for relative image and link URLs
+        self.page_id = page_id  # selects the images folder the <img> sources point to
+        self.parser = parser or default_parser()  # BeautifulSoup tree builder used by convert()
+        self.output_builder = output_builder
+        self.heading_index = HeadingIndex()  # levels and unique anchors of the headings
+        self.headings = self.heading_index.headings  # (level, anchor, text) in document order
+        self.assets = []
+        self.planned_files = set()  # local file names already requested
+        self.toc_macros = []  # TocOptions of each TOC placeholder, by placeholder number
+        self.toc_headings = None  # headings listed by the TOCs when known up front (see prescan_headings())
+        self.rendered_tocs = {}  # TocOptions -> Markdown, once the TOC headings are final
+        self.metrics = Metrics()
+        for name in dir(type(self)):
+            if name.startswith("convert_") and name not in self.UNTIMED_METHODS:
+                setattr(self, name, self._timed_handler(name, getattr(self, name)))
+
+    def _timed_handler(self, name, handler):
+        add_time = self.metrics.add_time
+
+        def timed(el, text, convert_as_inline):
+            start = time.perf_counter()
+            try:
+                return handler(el, text, convert_as_inline)
+            finally:
+                add_time(name, time.perf_counter() - start)
+        return timed
+
+    def convert(self, html):
+        # markdownify always uses html.parser; honor the configured (usually faster) parser instead
+        with self.metrics.timer("parse"):
+            soup = BeautifulSoup(html, self.parser)
+        with self.metrics.timer("convert"):
+            return self.convert_soup(soup)
+
+    #
+    # OUTPUT BUILDER
+    #
+    def process_tag(self, node, convert_as_inline, children_only=False):
+        if not self.output_builder:
+            return super().process_tag(node, convert_as_inline, children_only)
+        return "".join(self._process_fragments(node, convert_as_inline, children_only))
+
+    def _process_fragments(self, node, convert_as_inline, children_only=False):
+        """
+        List-building version of MarkdownConverter.process_tag(), with the same output: the
+        converted children are collected as a list of fragments, and only joined for tags whose
+        handler needs their text. Plain layout containers (divs without a macro, spans, sections)
+        pass their fragments up, so nested layouts no longer copy their content at every level.
+        """
+        is_heading = html_heading_re.match(node.name) is not None
+        is_cell = node.name in ("td", "th")
+        convert_children_as_inline = convert_as_inline
+        if not children_only and (is_heading or is_cell):
+            convert_children_as_inline = True
+
+        self._remove_block_whitespace(node)
+        fragments = []
+        for el in node.children:
+            if isinstance(el, (Comment, Doctype)):
+                continue
+            if isinstance(el, NavigableString):
+                fragments.append(self.process_text(el))
+                continue
+            # Adjacent blocks are separated by the larger of their newline runs
+            child_fragments = self._process_fragments(el, convert_children_as_inline)
+            newlines = max(pop_trailing_newlines(fragments), pop_leading_newlines(child_fragments))
+            if newlines:
+                fragments.append("\n" * newlines)
+            fragments.extend(child_fragments)
+
+        if children_only:
+            return fragments
+        convert_fn = getattr(self, "convert_%s" % node.name, None)
+        if not convert_fn or not self.should_convert_tag(node.name):
+            return fragments
+        if node.name == "div" and node.attrs.get("data-macro-name", "").lower() not in self.DIV_MACROS:
+            return ["\n\n", *fragments, "\n\n"]  # convert_div() of a plain div, without the copy
+        return [convert_fn(node, "".join(fragments), convert_as_inline)]
+
+    @staticmethod
+    def _remove_block_whitespace(node):
+        """
+        Remove whitespace-only text nodes just before, after or inside block-level elements,
+        as MarkdownConverter.process_tag() does before converting the children of node.
+        """
+        should_remove_inside = should_remove_whitespace_inside(node)
+        for el in node.children:
+            can_extract = (should_remove_inside and (not el.previous_sibling or not el.next_sibling)
+                           or should_remove_whitespace_outside(el.previous_sibling)
+                           or should_remove_whitespace_outside(el.next_sibling))
+            if isinstance(el, NavigableString) and str(el).strip() == "" and can_extract:
+                el.extract()
+
+    #
+    # STREAMING
+    #
+    def convert_stream(self, soup, write):
+        """
+        Streaming counterpart of convert_soup(): converts the top-level blocks of the page one at
+        a time and passes their Markdown to write() as soon as it is known, with the same newline
+        merging between blocks as convert_soup(). The contents of each converted block are
+        decomposed right away; the empty element stays, as the next block's text still looks at it.
+        After prescan_headings() the TOCs are written inline; otherwise their placeholders are left
+        in the output (see render_tocs()).
+        """
+        container = soup.body or soup
+        self._remove_block_whitespace(container)
+        pending_newlines = 0  # newlines at the end of the output that are not written yet
+        for el in container.children:
+            if isinstance(el, (Comment, Doctype)):
+                continue
+            if isinstance(el, NavigableString):
+                chunk = self.process_text(el)
+                newlines = pending_newlines
+                body = chunk.rstrip("\n")
+                if not body:
+                    pending_newlines += len(chunk)
+                    continue
+            else:
+                chunk = self.process_tag(el, convert_as_inline=False)
+                el.clear(decompose=True)
+                stripped = chunk.lstrip("\n")
+                newlines = max(pending_newlines, len(chunk) - len(stripped))
+                body = stripped.rstrip("\n")
+                if not body:
+                    pending_newlines = newlines
+                    continue
+            pending_newlines = len(chunk) - len(chunk.rstrip("\n"))
+            if self.toc_headings is not None and self.toc_macros:
+                body = splice_tocs(body, self.render_tocs())
+            write("\n" * newlines + body)
+        if pending_newlines:
+            write("\n" * pending_newlines)
+
+    def prescan_headings(self, soup):
+        """
+        Cheap pass over the parsed page that converts its headings only, so their final levels,
+        anchors and texts are known before the page itself is converted and TOCs can be rendered
+        as soon as their macro is reached. Each heading is converted from a copy by a scratch
+        converter with the same options: the handlers rewrite attributes (img src, a href) and
+        must still see the original tree in the real pass, which then records the same headings.
+        Headings nested in another heading are converted (and recorded) with the outer one.
+        """
+        scratch = TwoPassConverter(base_url=self.base_url, parser=self.parser, page_id=self.page_id, **self.options)
+        for el in soup.find_all(HEADING_TAGS):
+            if el.find_parent(HEADING_TAGS):
+                continue
+            scratch.process_tag(copy.copy(el), convert_as_inline=False)
+        self.toc_headings = scratch.headings
+        return self.toc_headings
+
+    slugify = staticmethod(slugify)
+
+    #
+    # HEADINGS
+    #
+    def convert_h1(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=1)
+
+    def convert_h2(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=2)
+
+    def convert_h3(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=3)
+
+    def convert_h4(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=4)
+
+    def convert_h5(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=5)
+
+    def convert_h6(self, el, text, convert_as_inline):
+        return self._convert_heading(el, text, level_from_tag=6)
+
+    def _convert_heading(self, el, heading_text, level_from_tag):
+        """
+        1) Possibly unify numeric prefixes from data-nh-numbering or <span class="nh-number">
+        2) If the heading text already starts with the same number, skip the prefix to avoid duplication.
+        3) Clamp heading levels so we don't skip (like going from H2 -> H4).
+        4) Give it an anchor that is unique on the page (see HeadingIndex).
+        """
+        # Gather prefix from data-nh-numbering or <span class="nh-number">
+        prefix = ""
+        # if there's a data-nh-numbering attribute
+        attr_prefix = el.attrs.get("data-nh-numbering")
+        if attr_prefix:
+            # e.g. "3. "
+            prefix += attr_prefix
+
+        # if there's a <span class="nh-number"> child
+        nh_span = el.find("span", {"class": "nh-number"})
+        if nh_span:
+            span_txt = nh_span.get_text(strip=True)
+            # Optional logic: skip if it's the same as attr_prefix
+            # or just append both
+            if span_txt and span_txt not in prefix:
+                prefix += span_txt
+
+        # Normalize the text, clamp the level (no jump from 2 -> 4) and give it a unique anchor
+        final_text = heading_title(heading_text, prefix)
+        final_level, _ = self.heading_index.add(level_from_tag, final_text)
+
+        # build the markdown heading
+        hashes = "#" * final_level
+        return f"\n\n{hashes} {final_text}\n\n"
+
+    #
+    # IMAGES
+    #
+    def convert_img(self, el, text, convert_as_inline):
+        src = el.attrs.get('data-image-src', el.attrs.get('src'))
+        if src and not src.startswith("http"):
+            src = self.base_url + src.replace("//", "")
+        logger.debug("Detected normal image: %s", src)
+
+        if "status-macro/placeholder" in src:
+            return super().convert_img(el, text, convert_as_inline) + "\n\n"
+
+        parsed_src = urlparse(src)
+        local_filename = unquote(os.path.basename(parsed_src.path))
+        # Only request the download here; resolve_assets() fetches everything in parallel later
+        if local_filename not in self.planned_files:
+            self.planned_files.add(local_filename)
+            cache_key = attachment_cache_key(el.attrs.get("data-linked-resource-id"),
+                                             el.attrs.get("data-linked-resource-version"))
+            self.assets.append(AssetRequest("image", src, local_filename, cache_key, None, None, None, None))
+        el.attrs['src'] = f"./{images_folder(self.page_id)}/{local_filename}"
+
+        return super().convert_img(el, text, convert_as_inline) + "\n\n"
+
+    #
+    # LINKS
+    #
+    def convert_a(self, el, text, convert_as_inline):
+        href = el.attrs.get('href', '')
+        if not href:
+            return super().convert_a(el, text, convert_as_inline)
+        if ABSOLUTE_URL_PATTERN.match(href):
+            return super().convert_a(el, text, convert_as_inline)
+
+        href = self.base_url + href
+        el.attrs['href'] = href
+
+        return super().convert_a(el, text, convert_as_inline)
+
+    #
+    # SPECIAL MACROS
+    #
+    def convert_div(self, el, text, convert_as_inline):
+        macro_name = el.attrs.get("data-macro-name", "").lower()
+
+        # 1) Draw.io
+        if macro_name == "drawio":
+            return self._convert_drawio_macro(el)
+
+        # 2) TOC
+        elif macro_name == "toc":
+            # We don't generate the TOC right now; we store a placeholder
+            placeholder_text = f"<<<TOC-{len(self.toc_macros)}>>>"
+            self.toc_macros.append(toc_options(el))
+            return placeholder_text  # We return this placeholder for now
+
+        # Else normal div
+        return f"\n\n{text}\n\n"
+
+    def _convert_drawio_macro(self, el):
+        # Find the hidden child <div id="drawio-macro-data-..."> that has Base64 JSON
+        macro_data_div = None
+        for child in el.children:
+            if (
+                    hasattr(child, "attrs") and
+                    "id" in child.attrs and
+                    child.attrs["id"].startswith("drawio-macro-data-")
+            ):
+                macro_data_div = child
+                break
+
+        if not macro_data_div:
+            return "\n\n[Error: No draw.io macro-data div found]\n\n"
+
+        raw_b64 = macro_data_div.get_text(strip=True)
+        if not raw_b64:
+            return "\n\n[Error: draw.io macro-data div is empty]\n\n"
+
+        try:
+            decoded_bytes = base64.b64decode(raw_b64)
+            macro_json = json.loads(decoded_bytes.decode("utf-8"))
+        except Exception as e:
+            return f"\n\n[Error decoding draw.io macro data: {e}]\n\n"
+
+        diagram_name = macro_json.get("diagramName", "")
+        preview_name = macro_json.get("previewName", "")
+        logger.debug("Detected draw.io diagramName: %s previewName: %s", diagram_name, preview_name)
+
+        # Possibly read style from the div
+        drawio_macro_div = el.find("div", {"class": "drawio-macro"})
+        width_px, height_px = None, None
+        if drawio_macro_div:
+            style_str = drawio_macro_div.attrs.get("style", "")
+            w_match = DRAWIO_WIDTH_PATTERN.search(style_str)
+            h_match = DRAWIO_HEIGHT_PATTERN.search(style_str)
+            if w_match:
+                width_px = w_match.group(1)
+            if h_match:
+                height_px = h_match.group(1)
+
+        # The PNG attachment is looked up and downloaded by resolve_assets()
+        placeholder = f"<<<DRAWIO-{len(self.assets)}>>>"
+        self.assets.append(AssetRequest("drawio", None, None, None, diagram_name, placeholder, width_px, height_px))
+        return f"\n\n{placeholder}\n\n"
+
+    def finalize_toc(self, text):
+        """
+        After we have fully parsed the HTML, we have:
+          - self.headings = all discovered headings
+          - self.toc_macros = the TocOptions of <<<TOC-0>>>, <<<TOC-1>>>, ...
+
+        This method replaces each placeholder with a bullet list referencing the headings,
+        in a single pass (see splice_tocs()).
+        """
+        if not self.toc_macros:
+            return text  # no toc macros found
+        return splice_tocs(text, self.render_tocs())
+
+    def render_tocs(self):
+        """
+        Markdown of every TOC placeholder, by placeholder number; macros with the same options
+        share one rendering. Only valid once all headings are known (after the conversion, or
+        after prescan_headings()).
+        """
+        rendered = self.rendered_tocs
+        for options in self.toc_macros:
+            if options not in rendered:
+                rendered[options] = self.render_toc(options)
+        return [rendered[options] for options in self.toc_macros]
+
+    def render_toc(self, options):
+        """
+        Markdown bullet list of the headings selected by a TocOptions, indented by level.
+        """
+        include = compile_toc_filter(options.include)
+        exclude = compile_toc_filter(options.exclude)
+        lines = []
+        headings = self.headings if self.toc_headings is None else self.toc_headings
+        for (level, anchor, heading_text) in headings:  # list of (level, anchor, text)
+            if not options.min_level <= level <= options.max_level:
+                continue
+            if include and not include.fullmatch(heading_text):
+                continue
+            if exclude and exclude.fullmatch(heading_text):
+                continue
+            indent = "  " * (level - options.min_level)
+            lines.append(f"{indent}- [{heading_text}](#{anchor})")
+
+        if not lines:
+            # no headings discovered, so just say so
+            return "\n\n(No headings found for TOC)\n\n"
+        return "\n".join(lines) + "\n\n"
+
+def custom_md(html_content, base_url="", parser=None, output_builder=False, page_id=None, **options):
+    """
+    1. We parse the HTML with TwoPassConverter to get an intermediate Markdown string with placeholders.
+    2. Then we do a finalize_toc() step to fill placeholders with the actual bullet list of headings.
+    This is pure (no network I/O, no globals): it returns a ConversionResult with the Markdown
+    and the AssetRequest list that resolve_assets() turns into local images.
+    parser selects the BeautifulSoup parser (see HTML_PARSERS); None picks the fastest installed.
+    output_builder selects the list-building conversion, followed by a blank-line collapsing pass.
+    page_id selects the images folder of the page (see images_folder()).
+    """
+    converter = TwoPassConverter(base_url=base_url, parser=parser, output_builder=output_builder, page_id=page_id,
+                                 **options)
+    intermediate_md = converter.convert(html_content)
+    with converter.metrics.timer("finalize_toc"):
+        final_md = converter.finalize_toc(intermediate_md)
+    if output_builder:
+        with converter.metrics.timer("collapse_blank_lines"):
+            final_md = collapse_blank_lines(final_md)
+    return ConversionResult(final_md, converter.assets, converter.metrics.snapshot())
+
+def stream_md(html_content, out_path, base_url="", parser=None, output_builder=False, header="", page_id=None,
+              **options):
+    """
+    Streaming counterpart of custom_md(): the Markdown of each top-level block is written to
+    out_path (after header) as soon as it is converted and the block is freed, so neither the
+    intermediate nor the final Markdown of the page is ever held in memory as a whole.
+    The headings are pre-scanned (see prescan_headings()), so TOCs are written inline and the
+    blank lines collapsed on the way with output_builder: only draw.io placeholders and failed
+    image downloads are left for apply_assets(). Returns a StreamedConversion.
+    """
+    converter = TwoPassConverter(base_url=base_url, parser=parser, output_builder=output_builder, page_id=page_id,
+                                 **options)
+    with converter.metrics.timer("parse"):
+        soup = BeautifulSoup(html_content, converter.parser)
+    with converter.metrics.timer("prescan_headings"):
+        converter.prescan_headings(soup)
+    digest = hashlib.sha256()
+    collapser = BlankLineCollapser() if output_builder else None
+
+    with open(out_path, "w", encoding="utf-8") as out:
+        def write(text):
+            if collapser:
+                text = collapser.feed(text)
+            out.write(text)
+            digest.update(text.encode("utf-8"))
+
+        out.write(header)  # kept out of the collapser, like the header write_page() adds
+        digest.update(header.encode("utf-8"))
+        with converter.metrics.timer("convert"):
+            converter.convert_stream(soup, write)
+    soup.decompose()
+    return StreamedConversion(out_path, converter.assets, digest.hexdigest(), converter.metrics.snapshot())
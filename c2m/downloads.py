@@ -0,0 +1,217 @@
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from .urls import images_folder
+
+logger = logging.getLogger(__name__)
+
+def clear_images_folder(folder="images"):
+    if os.path.exists(folder):
+        for filename in os.listdir(folder):
+            file_path = os.path.join(folder, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.unlink(file_path)
+            except Exception as e:
+                logger.warning("Failed to delete %s. Reason: %s", file_path, e)
+    else:
+        os.makedirs(folder)
+
+class ImageFolders:
+    """
+    Images folders prepared during one export run (or by one client), so each folder is created
+    (and optionally cleared) only once, however many times its page is exported.
+    """
+
+    def __init__(self):
+        self.prepared = set()
+        self.lock = threading.Lock()
+
+    def prepare(self, folder, clear=True):
+        with self.lock:
+            if folder in self.prepared:
+                return folder
+            self.prepared.add(folder)
+        if clear:
+            clear_images_folder(folder)
+        else:
+            os.makedirs(folder, exist_ok=True)
+        return folder
+
+class DownloadRegistry:
+    """
+    In-flight and completed downloads of one export run, keyed by URL, so each unique image is
+    fetched once even when many pages reference it (icons, status lozenges, logos). The first
+    request for a URL downloads it; concurrent and later requests wait for that download and
+    link (or copy) the file into their own images folder. A registry lives for one run only, so
+    the next run revalidates every image again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.downloads = {}  # image_url -> Future of the local path it was downloaded to
+
+    def claim(self, image_url):
+        """
+        (future, owner) for image_url. If owner is True the caller must download the image and
+        resolve the future with its local path (or its error); otherwise it waits on the future.
+        """
+        with self.lock:
+            future = self.downloads.get(image_url)
+            if future is not None:
+                return future, False
+            future = self.downloads[image_url] = Future()
+            return future, True
+
+    def forget(self, image_url):
+        """
+        Drop a failed download: requests already waiting get its error, later ones try again.
+        """
+        with self.lock:
+            self.downloads.pop(image_url, None)
+
+def link_or_copy(source_path, local_path):
+    """
+    Hardlink (or copy, across filesystems) source_path to local_path, replacing it atomically.
+    """
+    tmp_path = f"{local_path}.{threading.get_ident()}.part"
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:
+        shutil.copyfile(source_path, tmp_path)
+    os.replace(tmp_path, local_path)
+
+# Size of the chunks streamed from the response to disk, in bytes
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def download_image(client, image_url, local_path, chunk_size=DOWNLOAD_CHUNK_SIZE, max_size=None, cache_key=None,
+                   download_registry=None):
+    """
+    Stream an image or attachment to disk in chunks, so memory stays flat regardless of its size.
+    The data is written to a temporary file next to local_path and renamed into place once complete.
+    If a cache_key is given, unchanged attachments are served from the image cache instead;
+    otherwise a previously downloaded copy is revalidated with a conditional GET.
+    max_size (bytes) optionally caps the size of a single download.
+    With a download_registry, each URL is only downloaded once per run (see DownloadRegistry);
+    other requests for it get a link or copy of that file.
+    """
+    with client.metrics.timer("download"):
+        if download_registry is None:
+            _download_image(client, image_url, local_path, chunk_size, max_size, cache_key)
+            return
+        future, owner = download_registry.claim(image_url)
+        if owner:
+            try:
+                _download_image(client, image_url, local_path, chunk_size, max_size, cache_key)
+            except BaseException as e:
+                download_registry.forget(image_url)
+                future.set_exception(e)
+                raise
+            future.set_result(local_path)
+            return
+
+        source_path = future.result()
+        if not os.path.exists(source_path):
+            # The first copy was removed since (e.g. an images folder cleared by a later export)
+            _download_image(client, image_url, local_path, chunk_size, max_size, cache_key)
+            return
+        if source_path != local_path:
+            link_or_copy(source_path, local_path)
+        logger.debug("Image already downloaded, linked from %s: %s", source_path, local_path)
+        client.metrics.increment("download_dedup_hits")
+
+def _download_image(client, image_url, local_path, chunk_size, max_size, cache_key):
+    metrics = client.metrics
+    image_cache = client.image_cache
+    validator_store = client.validator_store
+    if cache_key and image_cache and image_cache.restore(cache_key, local_path):
+        logger.debug("Image served from cache: %s", local_path)
+        metrics.increment("image_cache_hits")
+        return
+
+    url_key = f"url:{image_url}"
+    request_headers = {}
+    if validator_store and image_cache and image_cache.has(url_key):
+        request_headers = validator_store.request_headers(image_url)
+
+    response = client.get(image_url, headers=request_headers, verify=False, stream=True)
+    if response.status_code == 304 and request_headers:
+        response.close()
+        if image_cache.restore(url_key, local_path):
+            logger.debug("Image not modified, served from cache: %s", local_path)
+            metrics.increment("image_cache_hits")
+            return
+        # The cached copy went away since the request was sent: a 304 has no body to write
+        logger.debug("Cached copy of %s is gone, downloading it again", image_url)
+        response = client.get(image_url, verify=False, stream=True)
+    with response:
+        if response.status_code == 304:
+            raise ValueError(f"{image_url} answered 304 Not Modified without a cached copy")
+        response.raise_for_status()
+        content_length = response.headers.get("Content-Length")
+        if max_size and content_length and int(content_length) > max_size:
+            raise ValueError(f"{image_url} is {content_length} bytes, above the limit of {max_size} bytes")
+
+        # Unique per thread: pages exported in parallel may share an images folder
+        tmp_path = f"{local_path}.{threading.get_ident()}.part"
+        try:
+            written = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    written += len(chunk)
+                    if max_size and written > max_size:
+                        raise ValueError(f"{image_url} exceeds the limit of {max_size} bytes")
+                    f.write(chunk)
+            os.replace(tmp_path, local_path)
+            metrics.increment("bytes_downloaded", written)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        if validator_store:
+            validator_store.update(image_url, response)
+    if image_cache:
+        image_cache.store(url_key, local_path)
+        if cache_key:
+            image_cache.store(cache_key, local_path)
+    logger.debug("Image downloaded: %s", local_path)
+    metrics.increment("images_downloaded")
+
+def download_images(client, image_downloads, workers=8, chunk_size=DOWNLOAD_CHUNK_SIZE, max_size=None,
+                    download_registry=None):
+    """
+    Download all queued images through a bounded thread pool and wait for them.
+    image_downloads maps local_path -> (image_url, cache_key) (one entry per target
+    file, so an image referenced twice is only written once).
+    Returns a list of (image_url, local_path, error) for the images that could not be downloaded.
+    """
+    failed = []
+    if not image_downloads:
+        return failed
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(download_image, client, image_url, local_path, chunk_size=chunk_size, max_size=max_size,
+                        cache_key=cache_key, download_registry=download_registry): (image_url, local_path)
+            for local_path, (image_url, cache_key) in image_downloads.items()
+        }
+        for future in as_completed(futures):
+            image_url, local_path = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning("Error downloading image %s: %s", image_url, e)
+                client.metrics.increment("download_errors")
+                failed.append((image_url, local_path, e))
+    return failed
+
+def restore_remote_image_links(markdown_text, failed_downloads, page_id=None):
+    """
+    Point references of images that failed to download back at their remote URL.
+    """
+    for image_url, local_path, _ in failed_downloads:
+        local_ref = f"(./{images_folder(page_id)}/{os.path.basename(local_path)}"
+        markdown_text = markdown_text.replace(local_ref, f"({image_url}")
+    return markdown_text
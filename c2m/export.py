@@ -0,0 +1,382 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from .assets import apply_assets, plan_asset_downloads, resolve_assets
+from .attachments import iter_child_pages
+from .client import fetch_json
+from .converter import custom_md, stream_md
+from .downloads import DOWNLOAD_CHUNK_SIZE, DownloadRegistry, ImageFolders, download_images
+from .urls import extract_page_info, images_folder, safe_filename
+
+logger = logging.getLogger(__name__)
+
+# Characters of intermediate Markdown copied at a time by write_streamed_page() (rounded up to a full line)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+class ExportOptions:
+    """
+    Settings of an export that are not tied to the HTTP client.
+      - download_workers: images downloaded in parallel per page
+      - chunk_size / max_image_size: streaming chunk size and optional size cap of a download, in bytes
+      - manifest: ExportManifest enabling incremental exports (None = always export)
+      - workers: pages exported in parallel by export_page_tree() and export_urls()
+      - convert_pool: executor running custom_md(), e.g. a ProcessPoolExecutor so the CPU-bound
+        conversion of many pages scales with cores (None = convert in the calling thread)
+      - parser: BeautifulSoup parser used by the conversion (None = fastest installed)
+      - output_builder: build the Markdown from fragment lists and collapse its blank lines
+        (see TwoPassConverter), cheaper on deeply nested layouts
+      - stream: write the Markdown block by block while converting (see stream_md()), so large
+        pages are never held in memory as a whole
+    """
+
+    def __init__(self, download_workers=8, chunk_size=DOWNLOAD_CHUNK_SIZE, max_image_size=None,
+                 manifest=None, workers=4, convert_pool=None, parser=None, output_builder=False, stream=False):
+        self.download_workers = download_workers
+        self.chunk_size = chunk_size
+        self.max_image_size = max_image_size
+        self.manifest = manifest
+        self.workers = workers
+        self.convert_pool = convert_pool
+        self.parser = parser
+        self.output_builder = output_builder
+        self.stream = stream
+
+def convert_html(html_content, base_url, options, page_id=None):
+    """
+    Run custom_md() on the options' convert pool, if any. Only the raw HTML string and the
+    base URL (plus the conversion settings) go to the worker, and the ConversionResult comes
+    back, so both sides pickle cheaply.
+    """
+    if options.convert_pool is None:
+        return custom_md(html_content, base_url=base_url, parser=options.parser,
+                         output_builder=options.output_builder, page_id=page_id)
+    return options.convert_pool.submit(custom_md, html_content, base_url=base_url, parser=options.parser,
+                                       output_builder=options.output_builder, page_id=page_id).result()
+
+def convert_html_stream(html_content, out_path, base_url, header, options, page_id=None):
+    """
+    convert_html() for the streaming path: runs stream_md(), writing header and the Markdown to out_path.
+    """
+    if options.convert_pool is None:
+        return stream_md(html_content, out_path, base_url=base_url, parser=options.parser,
+                         output_builder=options.output_builder, header=header, page_id=page_id)
+    return options.convert_pool.submit(stream_md, html_content, out_path, base_url=base_url, parser=options.parser,
+                                       output_builder=options.output_builder, header=header,
+                                       page_id=page_id).result()
+
+def fetch_page(client, page_id=None, space_key=None, page_title=None, expand="space,body.view,version,container"):
+    """
+    Fetch a page by id, or by space key + title. Returns the page JSON, or None if no page matched.
+    """
+    with client.metrics.timer("fetch_page"):
+        return _fetch_page(client, page_id, space_key, page_title, expand)
+
+def _fetch_page(client, page_id, space_key, page_title, expand):
+    if page_id:
+        data = fetch_json(client, f"{client.content_api}/{page_id}?expand={expand}")
+        return data if "id" in data else None
+    params = {
+        "spaceKey": space_key,
+        "title": page_title,
+        "expand": expand
+    }
+    data = fetch_json(client, client.content_api, params=params)
+    return data["results"][0] if data.get("size", 0) > 0 else None
+
+def unchanged_page(manifest, version_data, out_dir, page_title=None):
+    """
+    (page_id, page_title) if the manifest says this page version was already exported to the
+    file this run would write it to (<out_dir>/<title>.md), else None. A page recorded under
+    another output directory, or under a moved or renamed parent, is exported again.
+    """
+    if not manifest or not version_data:
+        return None
+    page_title = page_title or version_data.get("title", "")
+    page_version = version_data.get("version", {}).get("number")
+    if not manifest.is_up_to_date(version_data["id"], page_version, markdown_path(out_dir, page_title)):
+        return None
+    logger.info("Page %s unchanged (version %s), skipping.", version_data["id"], page_version)
+    return version_data["id"], page_title
+
+def page_images_dir(out_dir, page_id, options, image_folders):
+    """
+    Prepare and return the images folder of a page written to out_dir: <out_dir>/images/<page_id>,
+    so pages sharing out_dir (siblings in a tree, batch exports) never overwrite each other's images.
+    In incremental mode the folder is not cleared, as with a skipped page.
+    """
+    return image_folders.prepare(os.path.join(out_dir, images_folder(page_id)), clear=not options.manifest)
+
+def markdown_path(out_dir, page_title):
+    return os.path.join(out_dir, "{0}.md".format(safe_filename(page_title)))
+
+def write_page(result, page_title, out_dir, converted_markdown, manifest=None):
+    """
+    Save the Markdown of a page to a file named after its title and record it in the manifest.
+    """
+    markdown_content = f"# {page_title}\n\n" + converted_markdown
+    md_path = markdown_path(out_dir, page_title)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(markdown_content)
+
+    logger.info("Markdown saved in %s", md_path)
+
+    if manifest:
+        manifest.record(result["id"], result.get("version", {}).get("number"), page_title, md_path, markdown_content)
+    return md_path
+
+def iter_line_chunks(f, size=STREAM_CHUNK_SIZE):
+    """
+    Read a text file in chunks of about size characters that end at a line boundary.
+    """
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk + f.readline()
+
+def write_streamed_page(result, page_title, out_dir, streamed, drawio_targets, failed_downloads, manifest=None):
+    """
+    Streaming counterpart of write_page(): the file written by stream_md() is complete except
+    for its assets. Without draw.io diagrams or failed image downloads it is renamed into place
+    as is; otherwise it is copied to <title>.md chunk by chunk through apply_assets()
+    (placeholders never span lines), hashing on the fly, and removed.
+    """
+    md_path = markdown_path(out_dir, page_title)
+    if not drawio_targets and not failed_downloads:
+        os.replace(streamed.path, md_path)
+        sha256 = streamed.sha256
+    else:
+        digest = hashlib.sha256()
+        with open(streamed.path, encoding="utf-8") as intermediate, open(md_path, "w", encoding="utf-8") as f:
+            for chunk in iter_line_chunks(intermediate):
+                chunk = apply_assets(chunk, drawio_targets, failed_downloads, result["id"])
+                f.write(chunk)
+                digest.update(chunk.encode("utf-8"))
+        os.unlink(streamed.path)
+        sha256 = digest.hexdigest()
+
+    logger.info("Markdown saved in %s", md_path)
+
+    if manifest:
+        manifest.record(result["id"], result.get("version", {}).get("number"), page_title, md_path,
+                        sha256=sha256)
+    return md_path
+
+def export_page_streaming(client, result, page_title, out_dir, images_dir, options, download_registry=None):
+    """
+    Convert, resolve the assets of and write a fetched page with the streaming path (options.stream).
+    The HTML is taken out of result so the page JSON does not keep a second reference to it; it is
+    still held by the conversion until the page has been converted, next to its parsed tree.
+    """
+    intermediate_path = markdown_path(out_dir, page_title) + ".part"
+    streamed = convert_html_stream(result["body"]["view"].pop("value"), intermediate_path, client.base_url,
+                                   f"# {page_title}\n\n", options, page_id=result["id"])
+    client.metrics.merge(streamed.metrics)
+    downloads, drawio_targets = plan_asset_downloads(client, streamed.assets, result["id"], images_dir)
+    failed_downloads = download_images(client, downloads, workers=options.download_workers,
+                                       chunk_size=options.chunk_size, max_size=options.max_image_size,
+                                       download_registry=download_registry)
+    with client.metrics.timer("write"):
+        write_streamed_page(result, page_title, out_dir, streamed, drawio_targets, failed_downloads,
+                            options.manifest)
+
+def export_page(client, page_id=None, space_key=None, page_title=None, out_dir=".", options=None,
+                image_folders=None, download_registry=None):
+    """
+    Fetch, convert and write one page to <out_dir>/<title>.md, with its images in <out_dir>/images/<page_id>.
+    Returns (page_id, page_title) of the page, or None if no page was found.
+    image_folders defaults to the client's, so repeated calls never clear each other's images.
+    download_registry is the DownloadRegistry of the export run the page is part of, if any.
+    """
+    options = options or ExportOptions()
+    image_folders = image_folders or client.image_folders
+    if options.manifest:
+        # Cheap version lookup first; the body is only fetched if the page changed
+        version_data = fetch_page(client, page_id, space_key, page_title, expand="version")
+        skipped = unchanged_page(options.manifest, version_data, out_dir, page_title)
+        if skipped:
+            client.metrics.increment("pages_skipped")
+            return skipped
+
+    result = fetch_page(client, page_id, space_key, page_title)
+    if not result:
+        logger.warning("No page found.")
+        client.metrics.increment("pages_failed")
+        return None
+
+    page_id = result["id"]
+    if not page_title:
+        page_title = result.get("title", "")
+    images_dir = page_images_dir(out_dir, page_id, options, image_folders)
+    if options.stream:
+        export_page_streaming(client, result, page_title, out_dir, images_dir, options, download_registry)
+        client.metrics.increment("pages_exported")
+        return page_id, page_title
+
+    # 1) Convert HTML -> Markdown with placeholders for TOC and draw.io diagrams (no network I/O)
+    # 2) Then replace TOC placeholders with an actual bullet list referencing discovered headings
+    # 3) Resolve and download all assets requested by the conversion; wait for them before writing
+    conversion = convert_html(result["body"]["view"]["value"], client.base_url, options, page_id=page_id)
+    client.metrics.merge(conversion.metrics)
+    converted_markdown = resolve_assets(client, conversion, page_id, images_dir,
+                                        workers=options.download_workers, chunk_size=options.chunk_size,
+                                        max_size=options.max_image_size, download_registry=download_registry)
+
+    with client.metrics.timer("write"):
+        write_page(result, page_title, out_dir, converted_markdown, options.manifest)
+    client.metrics.increment("pages_exported")
+    return page_id, page_title
+
+def parse_page_target(client, page_url_or_id):
+    """
+    (space_key, page_title, page_id) of a page given by numeric id or by a URL on the client's host.
+    """
+    if isinstance(page_url_or_id, int) or str(page_url_or_id).isdigit():
+        return None, None, str(page_url_or_id)
+    parsed = urlparse(page_url_or_id)
+    if f"{parsed.scheme}://{parsed.netloc}" != client.base_url:
+        raise ValueError(f"{page_url_or_id} is not on {client.base_url}")
+    return extract_page_info(page_url_or_id)
+
+def convert_page(page_url_or_id, client, out_dir=".", options=None):
+    """
+    Library entry point: export one page, given by URL or numeric id, with an existing
+    ConfluenceClient, so long-lived workers keep its connection pool and caches warm.
+    Returns (page_id, page_title) of the page, or None if no page was found.
+    """
+    space_key, page_title, page_id = parse_page_target(client, page_url_or_id)
+    os.makedirs(out_dir, exist_ok=True)
+    return export_page(client, page_id, space_key, page_title, out_dir=out_dir, options=options)
+
+def resolve_root_page_id(client, page_id=None, space_key=None, page_title=None):
+    """
+    Page id to start a recursive export from; a bare space URL starts at the space homepage.
+    """
+    if page_id:
+        return page_id
+    if not page_title:
+        space_data = fetch_json(client, f"{client.base_url}/rest/api/space/{space_key}?expand=homepage")
+        return space_data.get("homepage", {}).get("id")
+    page = fetch_page(client, space_key=space_key, page_title=page_title, expand="version")
+    return page["id"] if page else None
+
+def export_page_tree(client, root_page_id, out_dir=".", options=None, image_folders=None, download_registry=None):
+    """
+    Export a page and all of its descendants with a pool of worker threads.
+    The children of a page are written to a directory named after it, mirroring the page hierarchy.
+    Each image URL is downloaded once for the whole tree (see DownloadRegistry).
+    Returns the number of exported pages; pages that failed are logged and counted in the
+    pages_failed counter of the client's metrics.
+    """
+    options = options or ExportOptions()
+    image_folders = image_folders or client.image_folders
+    download_registry = download_registry or DownloadRegistry()
+
+    def export_with_children(page_id, page_out_dir):
+        os.makedirs(page_out_dir, exist_ok=True)
+        exported = export_page(client, page_id=page_id, out_dir=page_out_dir, options=options,
+                               image_folders=image_folders, download_registry=download_registry)
+        if not exported:
+            return None, []
+        children_dir = os.path.join(page_out_dir, safe_filename(exported[1]))
+        return children_dir, list(iter_child_pages(client, page_id))
+
+    exported_count = 0
+    with ThreadPoolExecutor(max_workers=max(1, options.workers)) as pool:
+        pending = {pool.submit(export_with_children, root_page_id, out_dir): root_page_id}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_id = pending.pop(future)
+                try:
+                    children_dir, children = future.result()
+                except Exception as e:
+                    logger.error("Error exporting page %s: %s", page_id, e)
+                    client.metrics.increment("pages_failed")
+                    continue
+                if children_dir is None:
+                    continue
+                exported_count += 1
+                for child in children:
+                    pending[pool.submit(export_with_children, child["id"], children_dir)] = child["id"]
+    return exported_count
+
+def parse_page_url(client, page_url):
+    """
+    (space_key, page_title, page_id) of a page URL, or None if it is not on the Confluence host of the client.
+    """
+    parsed = urlparse(page_url)
+    if f"{parsed.scheme}://{parsed.netloc}" != client.base_url:
+        logger.warning("Skipping %s: all URLs must be on %s", page_url, client.base_url)
+        return None
+
+    space_key, page_title, page_id = extract_page_info(page_url)
+    if page_id:
+        logger.debug("Extracted pageId: %s", page_id)
+    else:
+        logger.debug("Extracted SPACE_KEY: %s", space_key)
+        logger.debug("Extracted PAGE_TITLE: %s", page_title)
+    return space_key, page_title, page_id
+
+def export_url(client, page_url, out_dir=".", options=None, recursive=False, image_folders=None,
+               download_registry=None):
+    """
+    Export the page (or, with recursive, the page tree) a Confluence URL points to.
+    """
+    page_info = parse_page_url(client, page_url)
+    if not page_info:
+        client.metrics.increment("pages_failed")
+        return
+    space_key, page_title, page_id = page_info
+
+    if recursive:
+        root_page_id = resolve_root_page_id(client, page_id, space_key, page_title)
+        if root_page_id:
+            count = export_page_tree(client, root_page_id, out_dir=out_dir, options=options,
+                                     image_folders=image_folders, download_registry=download_registry)
+            logger.info("Exported %d page(s) to %s", count, out_dir)
+        else:
+            logger.warning("No page found.")
+            client.metrics.increment("pages_failed")
+    else:
+        export_page(client, page_id, space_key, page_title, out_dir=out_dir, options=options,
+                    image_folders=image_folders, download_registry=download_registry)
+
+def export_urls(client, page_urls, out_dir=".", options=None, recursive=False):
+    """
+    Export a list of page URLs in one process, sharing the client's connection pool and caches.
+    Every page keeps its images in its own folder (see page_images_dir()); a URL listed twice is
+    exported once, so no two workers write the same page and images folder at the same time.
+    A URL that fails is logged and counted in the pages_failed counter; the others still run.
+    """
+    options = options or ExportOptions()
+    page_urls = list(dict.fromkeys(page_urls))
+    image_folders = ImageFolders()
+    download_registry = DownloadRegistry()  # each image URL is downloaded once per run
+    os.makedirs(out_dir, exist_ok=True)
+    if len(page_urls) == 1 or recursive:
+        # A recursive export already spreads each tree over the worker pool
+        for page_url in page_urls:
+            try:
+                export_url(client, page_url, out_dir, options, recursive, image_folders, download_registry)
+            except Exception as e:
+                logger.error("Error exporting %s: %s", page_url, e)
+                client.metrics.increment("pages_failed")
+        return
+
+    # Batch mode: all pages share the process, the connection pool and the caches
+    with ThreadPoolExecutor(max_workers=max(1, options.workers)) as pool:
+        futures = {
+            pool.submit(export_url, client, page_url, out_dir, options, recursive, image_folders,
+                        download_registry): page_url
+            for page_url in page_urls
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("Error exporting %s: %s", futures[future], e)
+                client.metrics.increment("pages_failed")
@@ -0,0 +1,74 @@
+import re
+from functools import lru_cache
+
+SLUG_PUNCTUATION_PATTERN = re.compile(r"[^\w\s-]")
+SLUG_WHITESPACE_PATTERN = re.compile(r"\s+")
+SLUG_DASHES_PATTERN = re.compile(r"-+")
+HEADING_WHITESPACE_PATTERN = re.compile(r"\s+")
+# Heading text that already carries its own numbering, e.g. "3.1 Details"
+NUMBERED_HEADING_PATTERN = re.compile(r"^\d+(\.\d+)*")
+
+@lru_cache(maxsize=4096)
+def slugify(text):
+    """
+    Convert heading text to a GitHub-like slug for anchor references.
+    E.g. "Background Info" -> "background-info"
+    Cached: pages repeat the same headings ("Overview", "Details", ...) many times.
+    """
+    slug = text.strip().lower()
+    slug = SLUG_PUNCTUATION_PATTERN.sub("", slug)    # Remove punctuation
+    slug = SLUG_WHITESPACE_PATTERN.sub("-", slug)    # Spaces -> dashes
+    slug = SLUG_DASHES_PATTERN.sub("-", slug)        # Collapse multiple dashes
+    return slug
+
+def heading_title(heading_text, prefix=""):
+    """
+    Final text of a heading: whitespace (and non-breaking spaces) normalized, with the numbering
+    prefix (data-nh-numbering or <span class="nh-number">) unless the text is already numbered.
+    """
+    text = HEADING_WHITESPACE_PATTERN.sub(" ", heading_text.replace("\u00a0", " ")).strip()
+    if NUMBERED_HEADING_PATTERN.match(text):
+        # heading_text already has a numeric prefix, so skip prefix to avoid duplication
+        return text
+    return (prefix + text).strip()
+
+class HeadingIndex:
+    """
+    Headings of one page, in document order, as (level, anchor, text):
+      - levels are clamped so the outline never skips a level (H2 -> H4 becomes H2 -> H3)
+      - anchors are unique the way GitHub makes them: the second "Overview" is "overview-1",
+        the third "overview-2", skipping anchors that are already taken
+    """
+
+    def __init__(self):
+        self.headings = []
+        self.last_level = 0
+        self.anchors = set()  # anchors already used on the page
+        self.duplicates = {}  # slug -> number of times it was repeated so far
+
+    def clamp_level(self, level):
+        if self.last_level and level > self.last_level + 1:
+            level = self.last_level + 1
+        self.last_level = level
+        return level
+
+    def unique_anchor(self, text):
+        slug = slugify(text)
+        anchor = slug
+        if anchor in self.anchors:
+            count = self.duplicates.get(slug, 0)
+            while anchor in self.anchors:
+                count += 1
+                anchor = f"{slug}-{count}"
+            self.duplicates[slug] = count
+        self.anchors.add(anchor)
+        return anchor
+
+    def add(self, level, text):
+        """
+        Record the next heading of the page; returns its (level, anchor).
+        """
+        level = self.clamp_level(level)
+        anchor = self.unique_anchor(text)
+        self.headings.append((level, anchor, text))
+        return level, anchor
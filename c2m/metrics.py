@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+class Metrics:
+    """
+    Timers and counters of an export run, shared by all threads of the run.
+      - timers: stage name -> (calls, total seconds, max seconds), e.g. fetch_page, parse,
+        convert_img, finalize_toc, download, write
+      - counters: name -> value, e.g. bytes_downloaded, image_cache_hits, retries, pages_failed
+    Conversions running in another process return a snapshot() that is merge()d back.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            calls, total, longest = self.timers.get(name, (0, 0.0, 0.0))
+            self.timers[name] = (calls + 1, total + seconds, max(longest, seconds))
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counter(self, name):
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def snapshot(self):
+        """
+        JSON-serializable (and picklable) copy of the timers and counters.
+        """
+        with self.lock:
+            return {
+                "timers": {
+                    name: {"calls": calls, "total_seconds": total, "max_seconds": longest}
+                    for name, (calls, total, longest) in sorted(self.timers.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def merge(self, snapshot):
+        """
+        Add the timers and counters of a snapshot() (e.g. from a conversion in a worker process).
+        """
+        if not snapshot:
+            return
+        with self.lock:
+            for name, timer in snapshot["timers"].items():
+                calls, total, longest = self.timers.get(name, (0, 0.0, 0.0))
+                self.timers[name] = (calls + timer["calls"], total + timer["total_seconds"],
+                                     max(longest, timer["max_seconds"]))
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def write_json(self, path):
+        """
+        Write the JSON summary to path ("-" prints it).
+        """
+        summary = json.dumps(self.snapshot(), indent=2)
+        if path == "-":
+            print(summary)
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+
+    def prometheus_text(self, prefix="c2m"):
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        timer_families = (
+            ("stage_seconds_total", "counter", "Seconds spent in each export stage.", "total_seconds"),
+            ("stage_calls_total", "counter", "Number of times each export stage ran.", "calls"),
+            ("stage_max_seconds", "gauge", "Longest single run of each export stage, in seconds.", "max_seconds"),
+        )
+        if snapshot["timers"]:
+            for family, metric_type, help_text, field in timer_families:
+                lines.append(f"# HELP {prefix}_{family} {help_text}")
+                lines.append(f"# TYPE {prefix}_{family} {metric_type}")
+                for name, timer in snapshot["timers"].items():
+                    lines.append(f'{prefix}_{family}{{stage="{name}"}} {timer[field]}')
+        for name, value in snapshot["counters"].items():
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write a node_exporter textfile; it is renamed into place so the collector never reads a partial file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
@@ -0,0 +1,49 @@
+from urllib.parse import urlparse, parse_qs, unquote_plus
+
+def extract_page_info(page_url):
+    """
+    Identical to your existing function, extended for multiple Confluence URL patterns.
+    """
+    parsed = urlparse(page_url)
+    if "viewpage.action" in parsed.path:
+        qs = parse_qs(parsed.query)
+        page_id = qs.get("pageId", [None])[0]
+        if page_id:
+            return None, None, page_id
+        space_key = qs.get("spaceKey", [None])[0]
+        raw_title = qs.get("title", [None])[0]
+        if space_key and raw_title:
+            page_title = unquote_plus(raw_title)
+            return space_key, page_title, None
+        raise ValueError("Neither pageId nor (spaceKey + title) found in the URL query.")
+    elif "display" in parsed.path:
+        parts = parsed.path.split('/')
+        if len(parts) >= 3:
+            space_key = parts[2]
+            page_title = unquote_plus(parts[3]) if len(parts) >= 4 else ""
+            return space_key, page_title, None
+        else:
+            raise ValueError("PAGE_URL in /display/ format does not have enough parts.")
+    elif "wiki" in parsed.path and "spaces" in parsed.path:
+        parts = parsed.path.split('/')
+        if len(parts) >= 7:
+            space_key = parts[3]
+            page_title = unquote_plus(parts[6])
+            return space_key, page_title, None
+        else:
+            raise ValueError("PAGE_URL in /wiki/spaces/ format does not have enough parts.")
+    else:
+        raise ValueError("PAGE_URL does not follow a recognized Confluence URL format.")
+
+def images_folder(page_id=None):
+    """
+    Images folder of a page, relative to its Markdown file: images/<page_id>. Pages written to
+    the same directory each get their own folder, so attachments with the same name never clash.
+    """
+    return f"images/{page_id}" if page_id else "images"
+
+def safe_filename(title):
+    """
+    Page title usable as a file or directory name.
+    """
+    return title.replace("/", "-").replace("\\", "-")